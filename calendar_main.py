@@ -15,7 +15,7 @@ from datetime import datetime
 from loguru import logger
 
 from src.config import config
-from src.calendar_notion.sync import CalendarNotionSync
+from src.calendar_notion.sync import CalendarNotionSync, event_fingerprint
 
 
 def setup_logger():
@@ -24,16 +24,38 @@ def setup_logger():
     logger.add(
         sys.stderr,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{message}</cyan>",
-        level=config.log_level
+        level=config.log_level,
+        enqueue=True  # 后台线程写入，日志调用不阻塞事件循环
     )
     logger.add(
         "logs/calendar_sync.log",
         rotation="10 MB",
         retention="7 days",
-        level="DEBUG"
+        level="DEBUG",
+        enqueue=True
     )
 
 
+# 全局同步实例：跨多次同步复用 Notion 客户端连接池和指纹缓存
+_sync_instance: CalendarNotionSync | None = None
+
+
+def get_sync() -> CalendarNotionSync:
+    """获取全局 CalendarNotionSync 实例（首次调用时创建）"""
+    global _sync_instance
+    if _sync_instance is None:
+        _sync_instance = CalendarNotionSync()
+    return _sync_instance
+
+
+async def close_sync():
+    """关闭全局 CalendarNotionSync 实例"""
+    global _sync_instance
+    if _sync_instance is not None:
+        await _sync_instance.aclose()
+        _sync_instance = None
+
+
 def get_calendar_reader():
     """获取日历读取器（用于轮询模式）"""
     if config.calendar_sync_mode == "applescript":
@@ -57,11 +79,15 @@ async def sync_events(reader=None):
 
     logger.info(f"获取到 {len(events)} 个事件")
 
-    # 同步到 Notion
-    sync = CalendarNotionSync()
-    stats = await sync.sync_events(events)
+    # 同步到 Notion（指纹未变化的事件跳过 Notion 查询）
+    fingerprints = {event.event_id: event_fingerprint(event) for event in events}
+    sync = get_sync()
+    stats = await sync.sync_events(events, fingerprints)
 
-    logger.info(
+    # 无变化的同步只记 debug，减少事件驱动模式下的日志量
+    changed = stats['created'] + stats['updated'] + stats['failed']
+    logger.log(
+        "INFO" if changed else "DEBUG",
         f"同步完成: 创建 {stats['created']}, "
         f"更新 {stats['updated']}, "
         f"跳过 {stats['skipped']}, "
@@ -75,6 +101,14 @@ async def sync_once():
     await sync_events()
 
 
+async def run_once():
+    """执行一次同步后释放资源"""
+    try:
+        await sync_once()
+    finally:
+        await close_sync()
+
+
 async def run_watcher_mode():
     """事件驱动模式（推荐）"""
     from src.calendar.eventkit_watcher import EventKitWatcher
@@ -101,15 +135,36 @@ async def run_watcher_mode():
         loop.add_signal_handler(sig, signal_handler)
 
     # 同步回调
+    # EventKitWatcher 已对通知做 5 秒防抖，这里再合并与进行中同步重叠的触发
+    # （通知、健康检查），避免并发全量同步：进行中只记一次，结束后补跑一次
+    sync_running = False
+    resync_requested = False
+
     async def on_calendar_changed():
-        logger.info("检测到日历变化，开始同步...")
-        await sync_events(watcher)
+        nonlocal sync_running, resync_requested
+        if sync_running:
+            resync_requested = True
+            logger.debug("同步进行中，合并本次日历变化")
+            return
+
+        sync_running = True
+        try:
+            while True:
+                resync_requested = False
+                logger.info("检测到日历变化，开始同步...")
+                await sync_events(watcher)
+                if not resync_requested:
+                    break
+        finally:
+            sync_running = False
 
     # 启动监听
     try:
         await watcher.start_watching(on_calendar_changed)
     except asyncio.CancelledError:
         pass
+    finally:
+        await close_sync()
 
     logger.info("日历同步服务已停止")
 
@@ -134,18 +189,19 @@ async def run_polling_mode():
     for sig in (signal.SIGINT, signal.SIGTERM):
         loop.add_signal_handler(sig, signal_handler)
 
-    # 首次同步
-    await sync_once()
-
-    # 定期同步
-    while not stop_event.is_set():
-        try:
-            await asyncio.wait_for(
-                stop_event.wait(),
-                timeout=config.calendar_check_interval
-            )
-        except asyncio.TimeoutError:
-            await sync_once()
+    try:
+        # 首次同步
+        await sync_once()
+
+        # 定期同步
+        while not stop_event.is_set():
+            try:
+                async with asyncio.timeout(config.calendar_check_interval):
+                    await stop_event.wait()
+            except TimeoutError:
+                await sync_once()
+    finally:
+        await close_sync()
 
     logger.info("日历同步服务已停止")
 
@@ -176,7 +232,7 @@ def main():
         sys.exit(1)
 
     if args.once:
-        asyncio.run(sync_once())
+        asyncio.run(run_once())
     elif args.mode == "watcher":
         asyncio.run(run_watcher_mode())
     else:
@@ -0,0 +1,43 @@
+"""
+调试脚本共用的辅助函数
+
+- 邮件读取：同一进程内（如 REPL 中依次运行多个调试脚本的 main()）复用同一个
+  EmailReader 和同一批未读邮件，不重复读取 Mail.app
+- Notion block 文本提取
+"""
+
+from functools import lru_cache
+
+# 带 rich_text 的块类型（文本位于 block[block_type]["rich_text"]）
+TEXT_BLOCK_KEYS = frozenset({
+    "paragraph", "callout", "quote", "code",
+    "bulleted_list_item", "numbered_list_item",
+    "heading_1", "heading_2", "heading_3",
+})
+
+
+@lru_cache(maxsize=1)
+def get_reader():
+    """获取共享的 EmailReader（首次调用时创建）"""
+    from src.mail.reader import EmailReader
+    return EmailReader()
+
+
+@lru_cache(maxsize=1)
+def get_first_unread() -> list:
+    """获取第一封未读邮件（列表，没有未读邮件时为空）"""
+    return get_reader().get_unread_emails(limit=1)
+
+
+def extract_text(block: dict) -> str:
+    """提取 block 的文本内容（第一段 rich_text）"""
+    block_type = block.get("type", "unknown")
+    try:
+        if block_type in TEXT_BLOCK_KEYS:
+            rich_text = block[block_type]["rich_text"]
+            return rich_text[0]["text"]["content"] if rich_text else ""
+        if block_type == "divider":
+            return "(divider)"
+    except Exception as e:
+        return f"(error: {e})"
+    return ""
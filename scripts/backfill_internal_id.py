@@ -20,133 +20,148 @@ Options:
 
 import sys
 import argparse
-import json
-import subprocess
+import asyncio
 from pathlib import Path
 from datetime import datetime
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 import sqlite3
+import orjson
 from src.config import config
+from src.mail.applescript_lookup import HOT_MAILBOXES, FetchResult, lookup_internal_id_script, lookup_metadata_script
 
 RESULT_FILE = Path("data/backfill_internal_id_result.json")
 
+# 每次 osascript 调用处理的记录数（控制在 300s 超时内）
+BATCH_SIZE = 200
 
-class FetchResult:
-    """AppleScript 查询结果"""
-    def __init__(self, internal_id: int = None, not_found: bool = False, error: str = None, metadata: dict = None):
-        self.internal_id = internal_id
-        self.not_found = not_found
-        self.error = error
-        self.metadata = metadata  # 完整元数据
-
-
-def get_internal_id_by_message_id(message_id: str, account_name: str) -> FetchResult:
-    """通过 message_id 从 Mail.app 获取 internal_id"""
-    escaped_id = message_id.replace('\\', '\\\\').replace('"', '\\"')
-
-    script = f'''
-    tell application "Mail"
-        tell account "{account_name}"
-            repeat with mbox in mailboxes
-                try
-                    set theMessage to first message of mbox whose message id is "{escaped_id}"
-                    return id of theMessage
-                end try
-            end repeat
-            return "NOT_FOUND"
-        end tell
-    end tell
-    '''
+# 同时运行的 osascript 进程数（Mail.app 可容忍少量并发 Apple Event）
+MAX_CONCURRENCY = 4
 
-    try:
-        result = subprocess.run(
-            ['osascript', '-e', script],
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
-        output = result.stdout.strip()
-
-        if output == "NOT_FOUND":
-            return FetchResult(not_found=True)
-
-        if not output:
-            return FetchResult(error="Empty response")
-
-        return FetchResult(internal_id=int(output))
-
-    except subprocess.TimeoutExpired:
-        return FetchResult(error="Timeout (300s)")
-    except ValueError as e:
-        return FetchResult(error=f"Invalid ID format: {e}")
-    except Exception as e:
-        return FetchResult(error=str(e))
-
-
-def get_metadata_by_internal_id(internal_id: int, account_name: str) -> FetchResult:
-    """通过 internal_id 从 Mail.app 获取完整元数据"""
-
-    script = f'''
-    tell application "Mail"
-        tell account "{account_name}"
-            repeat with mbox in mailboxes
-                try
-                    set theMessage to first message of mbox whose id is {internal_id}
-                    set msgId to message id of theMessage
-                    set msgSubject to subject of theMessage
-                    set msgSender to sender of theMessage
-                    set msgDate to date received of theMessage
-
-                    -- 格式化日期
-                    set dateStr to (year of msgDate as string) & "-"
-                    set monthNum to (month of msgDate as integer)
-                    if monthNum < 10 then set dateStr to dateStr & "0"
-                    set dateStr to dateStr & (monthNum as string) & "-"
-                    set dayNum to (day of msgDate as integer)
-                    if dayNum < 10 then set dateStr to dateStr & "0"
-                    set dateStr to dateStr & (dayNum as string) & "T"
-                    set hourNum to (hours of msgDate as integer)
-                    if hourNum < 10 then set dateStr to dateStr & "0"
-                    set dateStr to dateStr & (hourNum as string) & ":"
-                    set minuteNum to (minutes of msgDate as integer)
-                    if minuteNum < 10 then set dateStr to dateStr & "0"
-                    set dateStr to dateStr & (minuteNum as string) & ":"
-                    set secondNum to (seconds of msgDate as integer)
-                    if secondNum < 10 then set dateStr to dateStr & "0"
-                    set dateStr to dateStr & (secondNum as string)
-
-                    set mboxName to name of mbox
-
-                    return msgId & "{{{{SEP}}}}" & msgSubject & "{{{{SEP}}}}" & msgSender & "{{{{SEP}}}}" & dateStr & "{{{{SEP}}}}" & mboxName
-                end try
-            end repeat
-            return "NOT_FOUND"
-        end tell
-    end tell
-    '''
+# 每次从 SyncStore 流式读取的记录数（恰好填满一轮并发批次）
+STREAM_CHUNK_SIZE = BATCH_SIZE * MAX_CONCURRENCY
 
-    try:
-        result = subprocess.run(
-            ['osascript', '-e', script],
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-        output = result.stdout.strip()
+# IN (...) 查询每批参数个数（低于 SQLite 默认变量上限 999）
+SQL_IN_BATCH_SIZE = 500
 
-        if output == "NOT_FOUND":
-            return FetchResult(not_found=True)
+# 需要查询 Mail.app 的异常记录条件
+ELIGIBLE_PREDICATE = "(message_id IS NOT NULL AND message_id != '' AND IFNULL(sync_status, '') != 'deleted')"
 
-        if not output:
-            return FetchResult(error="Empty response")
+# 每处理 N 条记录提交一次事务（崩溃时最多丢失 N 条更新）
+COMMIT_INTERVAL = 500
+
+
+def _open_sync_store() -> sqlite3.Connection:
+    """打开 SyncStore 数据库（WAL + synchronous=NORMAL，减少 fsync）"""
+    conn = sqlite3.connect('data/sync_store.db')
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
 
-        parts = output.split("{{SEP}}")
-        if len(parts) < 5:
-            return FetchResult(error=f"Invalid response format: {output[:100]}")
 
-        return FetchResult(metadata={
+def _chunked(items: list, size: int):
+    """按固定大小切分列表"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _get_records_by_internal_ids(cursor: sqlite3.Cursor, internal_ids, columns: str) -> dict[int, sqlite3.Row]:
+    """用 IN (...) 批量读取 email_metadata，返回 {internal_id: Row}"""
+    records = {}
+    for batch in _chunked(list(set(internal_ids)), SQL_IN_BATCH_SIZE):
+        placeholders = ",".join("?" * len(batch))
+        cursor.execute(f'''
+            SELECT internal_id, {columns}
+            FROM email_metadata
+            WHERE internal_id IN ({placeholders})
+        ''', batch)
+        for row in cursor.fetchall():
+            records[row["internal_id"]] = row
+    return records
+
+
+
+
+async def _fetch_internal_id_batch(batch: list[str], account_name: str,
+                                   semaphore: asyncio.Semaphore) -> dict[str, FetchResult]:
+    """单批 message_id → internal_id 查询（一次 osascript 调用）"""
+    async with semaphore:
+        try:
+            output = await lookup_internal_id_script.run(
+                [account_name, "{{SEP}}".join(HOT_MAILBOXES), *batch], timeout=300
+            )
+        except asyncio.TimeoutError:
+            return {mid: FetchResult(error="Timeout (300s)") for mid in batch}
+        except Exception as e:
+            return {mid: FetchResult(error=str(e)) for mid in batch}
+
+    results: dict[str, FetchResult] = {}
+    for rec in output.split("{{REC}}"):
+        if "{{FIELD}}" not in rec:
+            continue
+        mid, _, raw_id = rec.partition("{{FIELD}}")
+        try:
+            results[mid] = FetchResult(internal_id=int(raw_id))
+        except ValueError as e:
+            results[mid] = FetchResult(error=f"Invalid ID format: {e}")
+
+    for mid in batch:
+        results.setdefault(mid, FetchResult(not_found=True))
+    return results
+
+
+async def get_internal_ids_by_message_ids(message_ids: list[str], account_name: str) -> dict[str, FetchResult]:
+    """通过 message_id 批量从 Mail.app 获取 internal_id
+
+    每 BATCH_SIZE 个 message_id 合并为一次 osascript 调用，
+    最多 MAX_CONCURRENCY 个调用并发执行。
+
+    Returns:
+        {message_id: FetchResult}
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    batch_results = await asyncio.gather(*[
+        _fetch_internal_id_batch(batch, account_name, semaphore)
+        for batch in _chunked(message_ids, BATCH_SIZE)
+    ])
+
+    results: dict[str, FetchResult] = {}
+    for batch_result in batch_results:
+        results.update(batch_result)
+    return results
+
+
+async def _fetch_metadata_batch(batch: list[int], account_name: str,
+                                semaphore: asyncio.Semaphore) -> dict[int, FetchResult]:
+    """单批 internal_id → 元数据查询（一次 osascript 调用）"""
+    async with semaphore:
+        try:
+            output = await lookup_metadata_script.run(
+                [account_name, "{{SEP}}".join(HOT_MAILBOXES), *map(str, batch)], timeout=300
+            )
+        except asyncio.TimeoutError:
+            return {iid: FetchResult(error="Timeout (300s)") for iid in batch}
+        except Exception as e:
+            return {iid: FetchResult(error=str(e)) for iid in batch}
+
+    results: dict[int, FetchResult] = {}
+    for rec in output.split("{{REC}}"):
+        if "{{FIELD}}" not in rec:
+            continue
+        raw_id, _, payload = rec.partition("{{FIELD}}")
+        try:
+            iid = int(raw_id.strip())
+        except ValueError:
+            continue
+        parts = payload.split("{{SEP}}")
+        if len(parts) < 5:
+            results[iid] = FetchResult(error=f"Invalid response format: {payload[:100]}")
+            continue
+        results[iid] = FetchResult(metadata={
             "message_id": parts[0],
             "subject": parts[1],
             "sender": parts[2],
@@ -154,165 +169,219 @@ def get_metadata_by_internal_id(internal_id: int, account_name: str) -> FetchRes
             "mailbox": parts[4]
         })
 
-    except subprocess.TimeoutExpired:
-        return FetchResult(error="Timeout (60s)")
-    except Exception as e:
-        return FetchResult(error=str(e))
+    for iid in batch:
+        results.setdefault(iid, FetchResult(not_found=True))
+    return results
+
+
+async def get_metadata_by_internal_ids(internal_ids: list[int], account_name: str) -> dict[int, FetchResult]:
+    """通过 internal_id 批量从 Mail.app 获取完整元数据
 
+    Returns:
+        {internal_id: FetchResult}
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    batch_results = await asyncio.gather(*[
+        _fetch_metadata_batch(batch, account_name, semaphore)
+        for batch in _chunked(internal_ids, BATCH_SIZE)
+    ])
 
-def fix_abnormal_ids(args):
+    results: dict[int, FetchResult] = {}
+    for batch_result in batch_results:
+        results.update(batch_result)
+    return results
+
+
+async def fix_abnormal_ids(args):
     """修复异常 internal_id（默认模式）"""
     print("=" * 60)
     print("修复 SyncStore 异常 internal_id")
     print("=" * 60)
 
     # 连接 SyncStore
-    conn = sqlite3.connect('data/sync_store.db')
-    conn.row_factory = sqlite3.Row
+    conn = _open_sync_store()
     cursor = conn.cursor()
 
-    # 查询异常 ID 记录
-    cursor.execute('''
-        SELECT internal_id, message_id, subject, sender, mailbox, sync_status
+    # 统计异常 ID 记录数（internal_id 为 INTEGER PRIMARY KEY，按 rowid 范围扫描）
+    # 无 message_id 或已标记 deleted 的记录无需查询 Mail.app，直接计入 skipped
+    total, eligible = cursor.execute(f'''
+        SELECT COUNT(*), COALESCE(SUM({ELIGIBLE_PREDICATE}), 0)
         FROM email_metadata
         WHERE internal_id > ?
-        ORDER BY internal_id
-    ''', (args.threshold,))
-
-    records = cursor.fetchall()
-    print(f"\n找到 {len(records)} 条异常 ID 记录 (> {args.threshold})")
+    ''', (args.threshold,)).fetchone()
+    print(f"\n找到 {total} 条异常 ID 记录 (> {args.threshold})")
 
-    if not records:
+    if not total:
         print("\n✅ 无异常记录")
         conn.close()
         return
 
+    skipped = total - eligible
+    if skipped:
+        print(f"  其中 {skipped} 条无 message_id 或已标记 deleted，跳过")
+
     if args.dry_run:
         print("\n[DRY RUN] 只检查不实际更新\n")
 
-    stats = {"total": len(records), "fixed": 0, "deleted": 0, "failed": 0}
+    stats = {"total": total, "fixed": 0, "deleted": 0, "failed": 0, "skipped": skipped}
     fixed_records = []
     deleted_records = []
     failed_records = []
 
-    for i, record in enumerate(records, 1):
-        old_id = record["internal_id"]
-        msg_id = record["message_id"]
-        subject = (record["subject"] or "N/A")[:40]
-        status = record["sync_status"]
-
-        print(f"\n[{i}/{len(records)}] {subject}")
-        print(f"  Old ID: {old_id}, Status: {status}")
-
-        if not msg_id:
-            print(f"  ⚠ 无 message_id，跳过")
-            stats["failed"] += 1
-            continue
-
-        # 查询 Mail.app
-        print(f"  → 查询 Mail.app...")
-        fetch_result = get_internal_id_by_message_id(msg_id, config.mail_account_name)
-
-        if fetch_result.error:
-            print(f"  ✗ 查询失败: {fetch_result.error}")
-            stats["failed"] += 1
-            failed_records.append({
-                "old_id": old_id,
-                "message_id": msg_id[:60],
-                "subject": subject,
-                "error": fetch_result.error
-            })
-            continue
-
-        if fetch_result.not_found:
-            print(f"  ✗ 邮件不存在（已删除）")
-            stats["deleted"] += 1
-            deleted_records.append({
-                "old_id": old_id,
-                "message_id": msg_id[:60],
-                "subject": subject
-            })
-
-            if not args.dry_run:
-                cursor.execute('''
-                    UPDATE email_metadata
-                    SET sync_status = 'deleted', updated_at = ?
-                    WHERE internal_id = ?
-                ''', (datetime.now().timestamp(), old_id))
-                conn.commit()
-                print(f"  → SyncStore 已标记 deleted")
-            continue
-
-        new_id = fetch_result.internal_id
-
-        # 检查新 ID 是否合理
-        if new_id > args.threshold:
-            print(f"  ⚠ 新 ID 仍异常: {new_id}，跳过")
-            stats["failed"] += 1
-            failed_records.append({
-                "old_id": old_id,
-                "new_id": new_id,
-                "message_id": msg_id[:60],
-                "subject": subject,
-                "error": "New ID still abnormal"
-            })
-            continue
-
-        # 检查新 ID 是否已被占用
-        cursor.execute('SELECT message_id, subject FROM email_metadata WHERE internal_id = ?', (new_id,))
-        existing = cursor.fetchone()
-        if existing and existing["message_id"] != msg_id:
-            print(f"  ⚠ ID {new_id} 已被占用: {(existing['subject'] or '')[:30]}")
-            print(f"    → 当前邮件可能已删除，标记 deleted")
-            stats["deleted"] += 1
-            deleted_records.append({
-                "old_id": old_id,
-                "conflict_id": new_id,
-                "message_id": msg_id[:60],
-                "subject": subject
-            })
-            if not args.dry_run:
-                cursor.execute('''
-                    UPDATE email_metadata
-                    SET sync_status = 'deleted', updated_at = ?
-                    WHERE internal_id = ?
-                ''', (datetime.now().timestamp(), old_id))
-                conn.commit()
-                print(f"  → SyncStore 已标记 deleted")
-            continue
-
-        print(f"  ✓ 新 ID: {new_id}")
+    # 本次运行已分配的新 ID：new_id -> message_id（跨分页有效，dry-run 下同样记录）
+    pending = {}
 
-        if not args.dry_run:
-            try:
-                cursor.execute('''
-                    UPDATE email_metadata
-                    SET internal_id = ?, updated_at = ?
-                    WHERE internal_id = ?
-                ''', (new_id, datetime.now().timestamp(), old_id))
-                conn.commit()
-                print(f"  → SyncStore 已更新")
-            except sqlite3.IntegrityError:
-                print(f"  ✗ 主键冲突，跳过")
-                stats["failed"] += 1
-                failed_records.append({
+    try:
+        # 按 internal_id 分页流式读取（keyset 分页，不持有跨越 UPDATE 的读游标）
+        i = 0
+        last_id = args.threshold
+        while True:
+            records = cursor.execute(f'''
+                SELECT internal_id, message_id, subject, sync_status
+                FROM email_metadata
+                WHERE internal_id > ? AND {ELIGIBLE_PREDICATE}
+                ORDER BY internal_id
+                LIMIT ?
+            ''', (last_id, STREAM_CHUNK_SIZE)).fetchall()
+            if not records:
+                break
+            last_id = records[-1]["internal_id"]
+
+            # 批量查询 Mail.app
+            message_ids = list(dict.fromkeys(r["message_id"] for r in records))
+            print(f"\n→ 批量查询 Mail.app（{len(message_ids)} 个 message_id，每批 {BATCH_SIZE}）...")
+            fetch_results = await get_internal_ids_by_message_ids(message_ids, config.mail_account_name)
+
+            # 一次性读取新 ID 的占用情况（本次运行已分配的 ID 由 pending 判断，无需再查库）
+            occupied = _get_records_by_internal_ids(
+                cursor,
+                (r.internal_id for r in fetch_results.values()
+                 if r.internal_id is not None and r.internal_id not in pending),
+                "message_id, subject"
+            )
+            deleted_ids = []
+
+            for record in records:
+                i += 1
+                if not args.dry_run and i % COMMIT_INTERVAL == 0:
+                    conn.commit()
+
+                old_id = record["internal_id"]
+                msg_id = record["message_id"]
+                subject = (record["subject"] or "N/A")[:40]
+                status = record["sync_status"]
+
+                print(f"\n[{i}/{eligible}] {subject}")
+                print(f"  Old ID: {old_id}, Status: {status}")
+
+                fetch_result = fetch_results[msg_id]
+
+                if fetch_result.error:
+                    print(f"  ✗ 查询失败: {fetch_result.error}")
+                    stats["failed"] += 1
+                    failed_records.append({
+                        "old_id": old_id,
+                        "message_id": msg_id[:60],
+                        "subject": subject,
+                        "error": fetch_result.error
+                    })
+                    continue
+
+                if fetch_result.not_found:
+                    print(f"  ✗ 邮件不存在（已删除）")
+                    stats["deleted"] += 1
+                    deleted_records.append({
+                        "old_id": old_id,
+                        "message_id": msg_id[:60],
+                        "subject": subject
+                    })
+
+                    if not args.dry_run:
+                        deleted_ids.append(old_id)
+                        print(f"  → SyncStore 待标记 deleted")
+                    continue
+
+                new_id = fetch_result.internal_id
+
+                # 检查新 ID 是否合理
+                if new_id > args.threshold:
+                    print(f"  ⚠ 新 ID 仍异常: {new_id}，跳过")
+                    stats["failed"] += 1
+                    failed_records.append({
+                        "old_id": old_id,
+                        "new_id": new_id,
+                        "message_id": msg_id[:60],
+                        "subject": subject,
+                        "error": "New ID still abnormal"
+                    })
+                    continue
+
+                # 检查新 ID 是否已被占用（先查本次运行已分配的 ID，再查库中原有记录）
+                if new_id in pending:
+                    existing = {"message_id": pending[new_id], "subject": "本次运行已分配"}
+                else:
+                    existing = occupied.get(new_id)
+                if existing and existing["message_id"] != msg_id:
+                    print(f"  ⚠ ID {new_id} 已被占用: {(existing['subject'] or '')[:30]}")
+                    print(f"    → 当前邮件可能已删除，标记 deleted")
+                    stats["deleted"] += 1
+                    deleted_records.append({
+                        "old_id": old_id,
+                        "conflict_id": new_id,
+                        "message_id": msg_id[:60],
+                        "subject": subject
+                    })
+                    if not args.dry_run:
+                        deleted_ids.append(old_id)
+                        print(f"  → SyncStore 待标记 deleted")
+                    continue
+
+                print(f"  ✓ 新 ID: {new_id}")
+
+                if not args.dry_run:
+                    try:
+                        cursor.execute('''
+                            UPDATE email_metadata
+                            SET internal_id = ?, updated_at = ?
+                            WHERE internal_id = ?
+                        ''', (new_id, datetime.now().timestamp(), old_id))
+                        print(f"  → SyncStore 已更新")
+                    except sqlite3.IntegrityError:
+                        print(f"  ✗ 主键冲突，跳过")
+                        stats["failed"] += 1
+                        failed_records.append({
+                            "old_id": old_id,
+                            "new_id": new_id,
+                            "message_id": msg_id[:60],
+                            "subject": subject,
+                            "error": "IntegrityError: duplicate internal_id"
+                        })
+                        continue
+
+                pending[new_id] = msg_id
+                stats["fixed"] += 1
+                fixed_records.append({
                     "old_id": old_id,
                     "new_id": new_id,
                     "message_id": msg_id[:60],
-                    "subject": subject,
-                    "error": "IntegrityError: duplicate internal_id"
+                    "subject": subject
                 })
-                continue
 
-        stats["fixed"] += 1
-        fixed_records.append({
-            "old_id": old_id,
-            "new_id": new_id,
-            "message_id": msg_id[:60],
-            "subject": subject
-        })
+            if deleted_ids:
+                now = datetime.now().timestamp()
+                cursor.executemany('''
+                    UPDATE email_metadata
+                    SET sync_status = 'deleted', updated_at = ?
+                    WHERE internal_id = ?
+                ''', [(now, old_id) for old_id in deleted_ids])
 
-    conn.close()
+        if not args.dry_run:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
     # 保存结果
     result = {
@@ -326,8 +395,7 @@ def fix_abnormal_ids(args):
         "failed_records": failed_records,
     }
     RESULT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(RESULT_FILE, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    RESULT_FILE.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
     # 输出结果
     print(f"\n{'=' * 60}")
@@ -337,10 +405,11 @@ def fix_abnormal_ids(args):
     print(f"  已修复:       {stats['fixed']}")
     print(f"  邮件已删除:   {stats['deleted']}")
     print(f"  失败:         {stats['failed']}")
+    print(f"  跳过:         {stats['skipped']}")
     print(f"\n详细结果已保存到: {RESULT_FILE}")
 
 
-def fix_metadata(args):
+async def fix_metadata(args):
     """修复元数据混淆（--fix-metadata 模式）"""
     print("=" * 60)
     print("修复 SyncStore 元数据混淆")
@@ -353,8 +422,7 @@ def fix_metadata(args):
     ids = [int(x.strip()) for x in args.ids.split(",")]
     print(f"\n要修复的 internal_id: {ids}")
 
-    conn = sqlite3.connect('data/sync_store.db')
-    conn.row_factory = sqlite3.Row
+    conn = _open_sync_store()
     cursor = conn.cursor()
 
     if args.dry_run:
@@ -364,83 +432,91 @@ def fix_metadata(args):
     fixed_records = []
     failed_records = []
 
-    for i, internal_id in enumerate(ids, 1):
-        # 获取当前 SyncStore 数据
-        cursor.execute('''
-            SELECT internal_id, message_id, subject, sender, mailbox, sync_status
-            FROM email_metadata
-            WHERE internal_id = ?
-        ''', (internal_id,))
-        record = cursor.fetchone()
+    # 一次性读取当前 SyncStore 数据，只为存在的记录查询 Mail.app
+    store_records = _get_records_by_internal_ids(cursor, ids, "message_id, subject, sender, mailbox, sync_status")
+    lookup_ids = [internal_id for internal_id in dict.fromkeys(ids) if internal_id in store_records]
+
+    print(f"→ 批量查询 Mail.app（{len(lookup_ids)} 个 internal_id，每批 {BATCH_SIZE}）...")
+    fetch_results = await get_metadata_by_internal_ids(lookup_ids, config.mail_account_name)
+
+    try:
+        for i, internal_id in enumerate(ids, 1):
+            if not args.dry_run and i % COMMIT_INTERVAL == 0:
+                conn.commit()
+
+            record = store_records.get(internal_id)
+
+            if not record:
+                print(f"\n[{i}/{len(ids)}] internal_id={internal_id}")
+                print(f"  ⚠ SyncStore 中不存在")
+                stats["failed"] += 1
+                continue
+
+            old_subject = (record["subject"] or "N/A")[:40]
+            old_sender = record["sender"] or "N/A"
 
-        if not record:
             print(f"\n[{i}/{len(ids)}] internal_id={internal_id}")
-            print(f"  ⚠ SyncStore 中不存在")
-            stats["failed"] += 1
-            continue
+            print(f"  当前: {old_subject}")
+            print(f"  发件人: {old_sender}")
 
-        old_subject = (record["subject"] or "N/A")[:40]
-        old_sender = record["sender"] or "N/A"
+            fetch_result = fetch_results[internal_id]
 
-        print(f"\n[{i}/{len(ids)}] internal_id={internal_id}")
-        print(f"  当前: {old_subject}")
-        print(f"  发件人: {old_sender}")
+            if fetch_result.error:
+                print(f"  ✗ 查询失败: {fetch_result.error}")
+                stats["failed"] += 1
+                failed_records.append({
+                    "internal_id": internal_id,
+                    "error": fetch_result.error
+                })
+                continue
 
-        # 从 Mail.app 获取正确元数据
-        print(f"  → 查询 Mail.app...")
-        fetch_result = get_metadata_by_internal_id(internal_id, config.mail_account_name)
+            if fetch_result.not_found:
+                print(f"  ✗ 邮件不存在")
+                stats["failed"] += 1
+                failed_records.append({
+                    "internal_id": internal_id,
+                    "error": "Not found in Mail.app"
+                })
+                continue
 
-        if fetch_result.error:
-            print(f"  ✗ 查询失败: {fetch_result.error}")
-            stats["failed"] += 1
-            failed_records.append({
-                "internal_id": internal_id,
-                "error": fetch_result.error
-            })
-            continue
+            meta = fetch_result.metadata
+            print(f"  ✓ Mail.app: {meta['subject'][:40]}")
+            print(f"    发件人: {meta['sender']}")
 
-        if fetch_result.not_found:
-            print(f"  ✗ 邮件不存在")
-            stats["failed"] += 1
-            failed_records.append({
+            if not args.dry_run:
+                cursor.execute('''
+                    UPDATE email_metadata
+                    SET message_id = ?, subject = ?, sender = ?,
+                        date_received = ?, mailbox = ?, updated_at = ?
+                    WHERE internal_id = ?
+                ''', (
+                    meta['message_id'],
+                    meta['subject'],
+                    meta['sender'],
+                    meta['date_received'],
+                    meta['mailbox'],
+                    datetime.now().timestamp(),
+                    internal_id
+                ))
+                print(f"  → SyncStore 已更新")
+
+            stats["fixed"] += 1
+            fixed_records.append({
                 "internal_id": internal_id,
-                "error": "Not found in Mail.app"
+                "old_subject": old_subject,
+                "old_sender": old_sender,
+                "new_subject": meta['subject'][:50],
+                "new_sender": meta['sender'],
+                "new_message_id": meta['message_id'][:60]
             })
-            continue
-
-        meta = fetch_result.metadata
-        print(f"  ✓ Mail.app: {meta['subject'][:40]}")
-        print(f"    发件人: {meta['sender']}")
 
         if not args.dry_run:
-            cursor.execute('''
-                UPDATE email_metadata
-                SET message_id = ?, subject = ?, sender = ?,
-                    date_received = ?, mailbox = ?, updated_at = ?
-                WHERE internal_id = ?
-            ''', (
-                meta['message_id'],
-                meta['subject'],
-                meta['sender'],
-                meta['date_received'],
-                meta['mailbox'],
-                datetime.now().timestamp(),
-                internal_id
-            ))
             conn.commit()
-            print(f"  → SyncStore 已更新")
-
-        stats["fixed"] += 1
-        fixed_records.append({
-            "internal_id": internal_id,
-            "old_subject": old_subject,
-            "old_sender": old_sender,
-            "new_subject": meta['subject'][:50],
-            "new_sender": meta['sender'],
-            "new_message_id": meta['message_id'][:60]
-        })
-
-    conn.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
     # 保存结果
     result = {
@@ -452,8 +528,7 @@ def fix_metadata(args):
         "failed_records": failed_records,
     }
     RESULT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(RESULT_FILE, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    RESULT_FILE.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
     print(f"\n{'=' * 60}")
     print("完成!")
@@ -473,9 +548,9 @@ def main():
     args = parser.parse_args()
 
     if args.fix_metadata:
-        fix_metadata(args)
+        asyncio.run(fix_metadata(args))
     else:
-        fix_abnormal_ids(args)
+        asyncio.run(fix_abnormal_ids(args))
 
 
 if __name__ == "__main__":
@@ -14,150 +14,288 @@
 - 清空 Notion 中的 ID 字段
 - 记录到 deleted_records 供查看
 
+AppleScript 查询结果（internal_id / 不存在）缓存在 data/applescript_lookup_cache.db，
+有效期内重复运行不再查询 Mail.app。
+
 Usage:
-    python3 scripts/backfill_notion_id.py [--dry-run] [--threshold N]
+    python3 scripts/backfill_notion_id.py [--dry-run] [--threshold N] [--no-cache]
 
 Options:
     --dry-run        只检查不实际更新
     --threshold N    判断异常 ID 的阈值（默认 100000）
+    --no-cache       忽略已缓存的 AppleScript 查询结果（结果仍写回缓存）
 """
 
 import sys
 import asyncio
 import argparse
-import json
-import subprocess
 from pathlib import Path
 from datetime import datetime
+from typing import AsyncIterator
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 import sqlite3
-from notion_client import AsyncClient
+import orjson
 from src.config import config
+from src.mail.applescript_lookup import HOT_MAILBOXES, FetchResult, lookup_internal_id_script
+from src.notion.page_view import PageInfo, get_property_ids, iter_database_pages, parse_page
+from src.notion.rate_limit import create_rate_limited_client
 
 RESULT_FILE = Path("data/backfill_notion_id_result.json")
 
+# AppleScript 查询结果缓存（跨运行复用）
+LOOKUP_CACHE_FILE = Path("data/applescript_lookup_cache.db")
+
+# 缓存有效期（秒）
+LOOKUP_CACHE_TTL = 7 * 24 * 3600
+
+# IN (...) 查询每批参数个数（低于 SQLite 默认变量上限 999）
+SQL_IN_BATCH_SIZE = 500
+
+# SyncStore 批量写入间隔（条）
+COMMIT_INTERVAL = 500
 
-class FetchResult:
-    """AppleScript 查询结果"""
-    def __init__(self, internal_id: int = None, not_found: bool = False, error: str = None):
-        self.internal_id = internal_id
-        self.not_found = not_found  # 明确找不到（邮件已删除）
-        self.error = error  # 其他错误（超时等）
+# 每次 osascript 调用查询的 message_id 数
+BATCH_SIZE = 50
 
+# 并发 AppleScript 查询数（每个查询一个 osascript 子进程）
+LOOKUP_CONCURRENCY = 4
 
-def get_internal_id_by_message_id(message_id: str, account_name: str) -> FetchResult:
-    """通过 AppleScript 从 Mail.app 获取邮件的 internal_id
+
+def _open_sync_store() -> sqlite3.Connection:
+    """打开 SyncStore 数据库（WAL + synchronous=NORMAL，减少逐条更新的 fsync）"""
+    conn = sqlite3.connect('data/sync_store.db')
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def _get_known_internal_ids(conn: sqlite3.Connection, message_ids: list, threshold: int) -> dict:
+    """从 SyncStore 批量读取已有的正常 internal_id（<= threshold，未标记 deleted）
+
+    Returns:
+        {message_id: internal_id}
+    """
+    known = {}
+    for i in range(0, len(message_ids), SQL_IN_BATCH_SIZE):
+        batch = message_ids[i:i + SQL_IN_BATCH_SIZE]
+        placeholders = ",".join("?" * len(batch))
+        rows = conn.execute(f'''
+            SELECT message_id, internal_id FROM email_metadata
+            WHERE message_id IN ({placeholders})
+              AND internal_id <= ?
+              AND IFNULL(sync_status, '') != 'deleted'
+        ''', (*batch, threshold)).fetchall()
+        known.update((row["message_id"], row["internal_id"]) for row in rows)
+    return known
+
+
+def _flush_sync_store(conn: sqlite3.Connection, fix_batch: list, delete_batch: list):
+    """批量写入 SyncStore 并提交（单事务）
 
     Args:
-        message_id: 邮件的 Message-ID
+        fix_batch: [(internal_id, updated_at, message_id), ...]
+        delete_batch: [(updated_at, message_id), ...]
+    """
+    if not fix_batch and not delete_batch:
+        return
+
+    cursor = conn.cursor()
+    try:
+        with conn:
+            cursor.executemany('''
+                UPDATE email_metadata
+                SET internal_id = ?, updated_at = ?
+                WHERE message_id = ?
+            ''', fix_batch)
+            cursor.executemany('''
+                UPDATE email_metadata
+                SET sync_status = 'deleted', updated_at = ?
+                WHERE message_id = ?
+            ''', delete_batch)
+    except sqlite3.IntegrityError:
+        # 批内存在主键冲突：整批已回滚，逐条重试并跳过冲突记录
+        with conn:
+            for row in fix_batch:
+                try:
+                    cursor.execute('''
+                        UPDATE email_metadata
+                        SET internal_id = ?, updated_at = ?
+                        WHERE message_id = ?
+                    ''', row)
+                except sqlite3.IntegrityError:
+                    print(f"    ⚠ SyncStore 主键冲突，跳过: internal_id={row[0]}")
+            cursor.executemany('''
+                UPDATE email_metadata
+                SET sync_status = 'deleted', updated_at = ?
+                WHERE message_id = ?
+            ''', delete_batch)
+    except Exception as e:
+        print(f"    ⚠ SyncStore 批量更新失败: {e}")
+
+    fix_batch.clear()
+    delete_batch.clear()
+
+
+class LookupCache:
+    """AppleScript 查询结果缓存（message_id → internal_id / NOT_FOUND）
+
+    只缓存明确的结果，查询失败（超时等）不缓存。
+    """
+
+    def __init__(self, path: Path = LOOKUP_CACHE_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS lookup_cache (
+                message_id TEXT PRIMARY KEY,
+                internal_id INTEGER,
+                not_found INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+
+    def get_many(self, message_ids: list, max_age: float = LOOKUP_CACHE_TTL) -> dict:
+        """读取未过期的缓存结果
+
+        Returns:
+            {message_id: FetchResult}
+        """
+        min_time = datetime.now().timestamp() - max_age
+        results = {}
+        for i in range(0, len(message_ids), SQL_IN_BATCH_SIZE):
+            batch = message_ids[i:i + SQL_IN_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(f'''
+                SELECT message_id, internal_id, not_found FROM lookup_cache
+                WHERE message_id IN ({placeholders}) AND fetched_at >= ?
+            ''', (*batch, min_time)).fetchall()
+            for message_id, internal_id, not_found in rows:
+                results[message_id] = FetchResult(internal_id=internal_id, not_found=bool(not_found))
+        return results
+
+    def put_many(self, results: dict):
+        """写入查询结果（忽略失败的结果）"""
+        now = datetime.now().timestamp()
+        with self.conn:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO lookup_cache (message_id, internal_id, not_found, fetched_at)
+                VALUES (?, ?, ?, ?)
+            ''', [
+                (mid, r.internal_id, int(r.not_found), now)
+                for mid, r in results.items() if not r.error
+            ])
+
+    def close(self):
+        self.conn.close()
+
+
+async def get_internal_ids_bulk(message_ids: list, account_name: str) -> dict:
+    """通过一次 AppleScript 调用从 Mail.app 批量获取邮件的 internal_id
+
+    Args:
+        message_ids: 邮件的 Message-ID 列表（建议不超过 BATCH_SIZE 个）
         account_name: Mail.app 账户名
 
     Returns:
-        FetchResult:
+        {message_id: FetchResult}
             - internal_id: 成功时返回
             - not_found: True 表示邮件确实不存在（已删除）
-            - error: 其他错误信息
+            - error: 其他错误信息（超时等，整批相同）
     """
-    escaped_id = message_id.replace('\\', '\\\\').replace('"', '\\"')
-
-    script = f'''
-    tell application "Mail"
-        tell account "{account_name}"
-            repeat with mbox in mailboxes
-                try
-                    set theMessage to first message of mbox whose message id is "{escaped_id}"
-                    return id of theMessage
-                end try
-            end repeat
-            return "NOT_FOUND"
-        end tell
-    end tell
-    '''
-
     try:
-        result = subprocess.run(
-            ['osascript', '-e', script],
-            capture_output=True,
-            text=True,
-            timeout=300  # 300 秒超时
+        output = await lookup_internal_id_script.run(
+            [account_name, "{{SEP}}".join(HOT_MAILBOXES), *message_ids], timeout=300
         )
-        output = result.stdout.strip()
-
-        if output == "NOT_FOUND":
-            return FetchResult(not_found=True)
+    except asyncio.TimeoutError:
+        return {mid: FetchResult(error="Timeout (300s)") for mid in message_ids}
+    except Exception as e:
+        return {mid: FetchResult(error=str(e)) for mid in message_ids}
 
-        if not output:
-            return FetchResult(error="Empty response")
+    results = {}
+    for rec in output.split("{{REC}}"):
+        if "{{FIELD}}" not in rec:
+            continue
+        mid, _, raw_id = rec.partition("{{FIELD}}")
+        try:
+            results[mid] = FetchResult(internal_id=int(raw_id))
+        except ValueError as e:
+            results[mid] = FetchResult(error=f"Invalid ID format: {e}")
 
-        return FetchResult(internal_id=int(output))
+    for mid in message_ids:
+        results.setdefault(mid, FetchResult(not_found=True))
+    return results
 
-    except subprocess.TimeoutExpired:
-        return FetchResult(error="Timeout (300s)")
-    except ValueError as e:
-        return FetchResult(error=f"Invalid ID format: {e}")
-    except Exception as e:
-        return FetchResult(error=str(e))
 
+async def get_internal_ids_by_message_ids(message_ids: list, account_name: str) -> dict:
+    """批量查询多个 message_id 的 internal_id
 
-async def query_notion_abnormal_pages(notion, database_id: str, threshold: int):
-    """查询 Notion 中 ID 为空或异常的页面
+    每 BATCH_SIZE 个 message_id 合并为一次 osascript 调用，
+    最多 LOOKUP_CONCURRENCY 个调用并发执行。
 
     Returns:
-        list of pages
+        {message_id: FetchResult}
     """
-    pages = []
-
-    # 查询 1: ID 为空
-    print("  [1/2] 查询 ID 为空的页面...")
-    has_more = True
-    start_cursor = None
-    while has_more:
-        params = {
-            "database_id": database_id,
-            "filter": {"property": "ID", "number": {"is_empty": True}},
-            "page_size": 100
-        }
-        if start_cursor:
-            params["start_cursor"] = start_cursor
-        result = await notion.databases.query(**params)
-        for page in result["results"]:
-            page["_issue_type"] = "empty"
-        pages.extend(result["results"])
-        has_more = result.get("has_more", False)
-        start_cursor = result.get("next_cursor")
-    print(f"    找到 {len(pages)} 个 ID 为空的页面")
-
-    # 查询 2: ID > threshold
-    print(f"  [2/2] 查询 ID > {threshold} 的页面...")
+    semaphore = asyncio.Semaphore(LOOKUP_CONCURRENCY)
+    batches = [message_ids[i:i + BATCH_SIZE] for i in range(0, len(message_ids), BATCH_SIZE)]
+    done = 0
+
+    async def lookup(batch: list) -> dict:
+        nonlocal done
+        async with semaphore:
+            batch_results = await get_internal_ids_bulk(batch, account_name)
+        done += len(batch)
+        print(f"    已查询 {done}/{len(message_ids)}")
+        return batch_results
+
+    results = {}
+    for batch_results in await asyncio.gather(*(lookup(batch) for batch in batches)):
+        results.update(batch_results)
+    return results
+
+
+async def iter_notion_abnormal_pages(notion, database_id: str, threshold: int) -> AsyncIterator[PageInfo]:
+    """逐个产出 Notion 中 ID 为空或异常的页面（单次 or 过滤分页查询，只保留 PageInfo）"""
+    empty_count = 0
     abnormal_count = 0
-    has_more = True
-    start_cursor = None
-    while has_more:
-        params = {
-            "database_id": database_id,
-            "filter": {"property": "ID", "number": {"greater_than": threshold}},
-            "page_size": 100
-        }
-        if start_cursor:
-            params["start_cursor"] = start_cursor
-        result = await notion.databases.query(**params)
-        for page in result["results"]:
-            page["_issue_type"] = "abnormal"
+
+    print(f"  查询 ID 为空或 > {threshold} 的页面...")
+    filter_properties = await get_property_ids(notion, database_id, ["Message ID", "Subject", "Date", "ID"])
+    async for page in iter_database_pages(
+        notion,
+        database_id=database_id,
+        filter={
+            "or": [
+                {"property": "ID", "number": {"is_empty": True}},
+                {"property": "ID", "number": {"greater_than": threshold}}
+            ]
+        },
+        page_size=100,
+        filter_properties=filter_properties
+    ):
+        info = parse_page(page)
+        if info.id_number is None:
+            empty_count += 1
+        else:
             abnormal_count += 1
-        pages.extend(result["results"])
-        has_more = result.get("has_more", False)
-        start_cursor = result.get("next_cursor")
-    print(f"    找到 {abnormal_count} 个 ID 异常的页面")
+        yield info
 
-    return pages
+    print(f"    找到 {empty_count} 个 ID 为空的页面")
+    print(f"    找到 {abnormal_count} 个 ID 异常的页面")
 
 
 async def main():
     parser = argparse.ArgumentParser(description="修复 Notion 页面 ID 字段")
     parser.add_argument("--dry-run", action="store_true", help="只检查不实际更新")
     parser.add_argument("--threshold", type=int, default=100000, help="异常 ID 阈值（默认 100000）")
+    parser.add_argument("--no-cache", action="store_true", help="忽略已缓存的 AppleScript 查询结果")
     args = parser.parse_args()
 
     print("=" * 60)
@@ -166,11 +304,11 @@ async def main():
 
     # 1. 查询 Notion 中异常页面
     print("\n[Step 1] 查询 Notion 中异常页面...")
-    notion = AsyncClient(auth=config.notion_token)
+    notion = create_rate_limited_client()
 
-    abnormal_pages = await query_notion_abnormal_pages(
-        notion, config.email_database_id, args.threshold
-    )
+    abnormal_pages = [
+        page async for page in iter_notion_abnormal_pages(notion, config.email_database_id, args.threshold)
+    ]
 
     print(f"\n  共找到 {len(abnormal_pages)} 个需要修复的页面")
 
@@ -181,11 +319,31 @@ async def main():
 
     # 2. 连接 SyncStore
     print("\n[Step 2] 连接 SyncStore...")
-    conn = sqlite3.connect('data/sync_store.db')
-    conn.row_factory = sqlite3.Row
-
-    # 3. 逐个修复
-    print(f"\n[Step 3] 修复页面...")
+    conn = _open_sync_store()
+
+    # 3. 优先使用 SyncStore 中已有的正常 internal_id，其余再批量查询 Mail.app
+    message_ids = list(dict.fromkeys(
+        page.message_id for page in abnormal_pages if page.message_id
+    ))
+    known_ids = _get_known_internal_ids(conn, message_ids, args.threshold)
+    print(f"\n[Step 3] SyncStore 已有 {len(known_ids)} 个正常 internal_id")
+
+    lookup_ids = [mid for mid in message_ids if mid not in known_ids]
+    lookup_cache = LookupCache()
+    fetch_results = {} if args.no_cache else lookup_cache.get_many(lookup_ids)
+    print(f"  AppleScript 缓存命中 {len(fetch_results)} 个")
+
+    lookup_ids = [mid for mid in lookup_ids if mid not in fetch_results]
+    print(f"  批量查询 Mail.app（{len(lookup_ids)} 个 message_id，每批 {BATCH_SIZE}，并发 {LOOKUP_CONCURRENCY}）...")
+    new_results = await get_internal_ids_by_message_ids(lookup_ids, config.mail_account_name)
+    lookup_cache.put_many(new_results)
+    lookup_cache.close()
+
+    fetch_results.update(new_results)
+    fetch_results.update((mid, FetchResult(internal_id=iid)) for mid, iid in known_ids.items())
+
+    # 4. 逐个修复
+    print(f"\n[Step 4] 修复页面...")
     if args.dry_run:
         print("  [DRY RUN] 只检查不实际更新\n")
 
@@ -200,19 +358,20 @@ async def main():
     deleted_records = []
     failed_records = []
 
+    # SyncStore 待写入记录，每 COMMIT_INTERVAL 条及结束时批量提交
+    fix_batch = []
+    delete_batch = []
+
     for i, page in enumerate(abnormal_pages, 1):
-        props = page["properties"]
-        page_id = page["id"]
-        issue_type = page.get("_issue_type", "unknown")
-
-        # 提取页面信息
-        msg_id_items = props.get("Message ID", {}).get("rich_text", [])
-        msg_id = msg_id_items[0].get("plain_text", "") if msg_id_items else ""
-        subject_items = props.get("Subject", {}).get("title", [])
-        subject = subject_items[0].get("plain_text", "N/A")[:50] if subject_items else "N/A"
-        date_prop = props.get("Date", {}).get("date", {})
-        date_str = (date_prop.get("start", "")[:10] if date_prop else "N/A")
-        old_id = props.get("ID", {}).get("number")
+        if len(fix_batch) + len(delete_batch) >= COMMIT_INTERVAL:
+            _flush_sync_store(conn, fix_batch, delete_batch)
+
+        page_id = page.page_id
+        issue_type = "empty" if page.id_number is None else "abnormal"
+        msg_id = page.message_id
+        subject = (page.subject or "N/A")[:50]
+        date_str = page.date[:10] if page.date else "N/A"
+        old_id = page.id_number
 
         print(f"\n  [{i}/{len(abnormal_pages)}] {date_str} | {subject[:40]}")
         print(f"    Issue: {issue_type}, Old ID: {old_id}")
@@ -222,9 +381,8 @@ async def main():
             stats["skipped"] += 1
             continue
 
-        # 通过 AppleScript 获取真实 internal_id
-        print(f"    → 查询 Mail.app...")
-        fetch_result = get_internal_id_by_message_id(msg_id, config.mail_account_name)
+        # internal_id 查询结果（Step 3 已从 SyncStore / Mail.app 获取）
+        fetch_result = fetch_results[msg_id]
 
         if fetch_result.error:
             # 其他错误（超时等），不能确定邮件是否存在
@@ -263,18 +421,9 @@ async def main():
                 except Exception as e:
                     print(f"    ✗ Notion 更新失败: {e}")
 
-                # 标记 SyncStore 为 deleted
-                try:
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        UPDATE email_metadata
-                        SET sync_status = 'deleted', updated_at = ?
-                        WHERE message_id = ?
-                    ''', (datetime.now().timestamp(), msg_id))
-                    conn.commit()
-                    print(f"    → SyncStore 已标记 deleted")
-                except Exception as e:
-                    print(f"    ⚠ SyncStore 更新失败: {e}")
+                # 标记 SyncStore 为 deleted（批量提交）
+                delete_batch.append((datetime.now().timestamp(), msg_id))
+                print(f"    → SyncStore 待标记 deleted")
             continue
 
         internal_id = fetch_result.internal_id
@@ -297,18 +446,10 @@ async def main():
         print(f"    ✓ 获取到 internal_id: {internal_id}")
 
         if not args.dry_run:
-            # 更新 SyncStore
-            try:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE email_metadata
-                    SET internal_id = ?, updated_at = ?
-                    WHERE message_id = ?
-                ''', (internal_id, datetime.now().timestamp(), msg_id))
-                conn.commit()
-                print(f"    → SyncStore 已更新")
-            except Exception as e:
-                print(f"    ⚠ SyncStore 更新失败: {e}")
+            # 更新 SyncStore（批量提交；ID 本就来自 SyncStore 时无需更新）
+            if msg_id not in known_ids:
+                fix_batch.append((internal_id, datetime.now().timestamp(), msg_id))
+                print(f"    → SyncStore 待更新")
 
             # 更新 Notion
             try:
@@ -341,6 +482,7 @@ async def main():
             "new_id": internal_id
         })
 
+    _flush_sync_store(conn, fix_batch, delete_batch)
     conn.close()
     await notion.aclose()
 
@@ -355,8 +497,7 @@ async def main():
         "failed_records": failed_records,
     }
     RESULT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(RESULT_FILE, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    RESULT_FILE.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2))
 
     # 输出结果
     print(f"\n{'=' * 60}")
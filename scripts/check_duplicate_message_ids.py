@@ -4,64 +4,33 @@
 import sys
 import asyncio
 from pathlib import Path
-from collections import defaultdict
+from typing import AsyncIterator
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from notion_client import AsyncClient
 from src.config import config
+from src.notion.page_view import get_property_ids, iter_database_pages, parse_page
+from src.notion.rate_limit import create_rate_limited_client
 
 
-async def get_all_pages(client: AsyncClient, database_id: str):
-    """获取数据库中所有页面（处理分页）"""
-    all_pages = []
-    has_more = True
-    start_cursor = None
+async def iter_all_pages(client: AsyncClient, database_id: str) -> AsyncIterator[dict]:
+    """逐个产出数据库中的所有页面（处理分页，不在内存中累积）"""
+    count = 0
+    async for page in iter_database_pages(
+        client,
+        database_id=database_id,
+        page_size=100,
+        filter_properties=await get_property_ids(client, database_id, ["Message ID", "Subject", "Date"])
+    ):
+        yield page
+        count += 1
+        if count % 100 == 0:
+            print(f"已获取 {count} 条记录...", end="\r")
 
-    while has_more:
-        query_params = {"database_id": database_id, "page_size": 100}
-        if start_cursor:
-            query_params["start_cursor"] = start_cursor
-
-        response = await client.databases.query(**query_params)
-        all_pages.extend(response.get("results", []))
-
-        has_more = response.get("has_more", False)
-        start_cursor = response.get("next_cursor")
-
-        print(f"已获取 {len(all_pages)} 条记录...", end="\r")
-
-    print(f"共获取 {len(all_pages)} 条记录         ")
-    return all_pages
-
-
-def extract_message_id(page: dict) -> tuple[str | None, str, str]:
-    """从页面中提取 Message ID 和标题"""
-    properties = page.get("properties", {})
-
-    # 提取 Message ID
-    message_id_prop = properties.get("Message ID", {})
-    message_id = None
-    if message_id_prop.get("type") == "rich_text":
-        rich_text = message_id_prop.get("rich_text", [])
-        if rich_text:
-            message_id = rich_text[0].get("plain_text", "")
-
-    # 提取标题 (Subject)
-    title_prop = properties.get("Subject", {})
-    title = ""
-    if title_prop.get("type") == "title":
-        title_list = title_prop.get("title", [])
-        if title_list:
-            title = title_list[0].get("plain_text", "")
-
-    # 提取日期
-    date_prop = properties.get("Date", {})
-    date = ""
-    if date_prop.get("type") == "date" and date_prop.get("date"):
-        date = date_prop.get("date", {}).get("start", "")
-
-    return message_id, title, date
+    print(f"共获取 {count} 条记录         ")
 
 
 async def main():
@@ -71,40 +40,40 @@ async def main():
     print(f"Database ID: {config.email_database_id}")
     print()
 
-    client = AsyncClient(auth=config.notion_token)
+    client = create_rate_limited_client()
 
-    # 获取所有页面
+    # 流式获取所有页面并收集 Message ID
     print("正在获取所有页面...")
-    pages = await get_all_pages(client, config.email_database_id)
-
-    # 收集 Message ID
-    message_id_map = defaultdict(list)  # message_id -> [(page_id, title, date), ...]
+    # 只出现一次的 message_id 只保留首个页面；再次出现时移入 duplicates
+    first_seen = {}  # message_id -> {page_id, title, date}
+    duplicates = {}  # message_id -> [{page_id, title, date}, ...]
     empty_message_id_count = 0
+    total_pages = 0
 
-    for page in pages:
-        page_id = page["id"]
-        message_id, title, date = extract_message_id(page)
+    async for page in iter_all_pages(client, config.email_database_id):
+        total_pages += 1
+        info = parse_page(page)
 
-        if not message_id:
+        if not info.message_id:
             empty_message_id_count += 1
             continue
 
-        message_id_map[message_id].append({
-            "page_id": page_id,
-            "title": title,
-            "date": date
-        })
-
-    # 找出重复的
-    duplicates = {mid: entries for mid, entries in message_id_map.items() if len(entries) > 1}
+        mid = info.message_id
+        entry = {"page_id": info.page_id, "title": info.subject, "date": info.date}
+        if mid in duplicates:
+            duplicates[mid].append(entry)
+        elif mid in first_seen:
+            duplicates[mid] = [first_seen.pop(mid), entry]
+        else:
+            first_seen[mid] = entry
 
     # 输出结果
     print()
     print("=" * 70)
     print("统计结果")
     print("=" * 70)
-    print(f"总页面数: {len(pages)}")
-    print(f"有效 Message ID 数: {len(message_id_map)}")
+    print(f"总页面数: {total_pages}")
+    print(f"有效 Message ID 数: {len(first_seen) + len(duplicates)}")
     print(f"空 Message ID 数: {empty_message_id_count}")
     print(f"重复的 Message ID 数: {len(duplicates)}")
 
@@ -5,6 +5,9 @@ import re
 from src.mail.reader import EmailReader
 from loguru import logger
 
+# HTML 中的 cid: 引用
+_CID_RE = re.compile(r'cid:([^"\'\s>]+)', re.IGNORECASE)
+
 def main():
     reader = EmailReader()
 
@@ -29,51 +32,46 @@ def main():
 
     # 检查 HTML 中的 cid 引用
     if target.content_type == 'text/html':
-        cid_pattern = r'cid:([^"\'\s>]+)'
-        cid_matches = re.findall(cid_pattern, target.content, re.IGNORECASE)
+        cid_matches = _CID_RE.findall(target.content)
 
         print(f'\n🔍 Found {len(cid_matches)} cid references in HTML:')
         unique_cids = set(cid_matches)
         for cid in sorted(unique_cids):
             print(f'  - cid:{cid}')
 
-        # 匹配 cid 到附件
+        # 匹配 cid 到附件：先按文件名 / 去扩展名文件名做哈希查找，未命中再回退到子串匹配
+        image_atts = [att for att in target.attachments if att.content_type.startswith('image/')]
+        by_filename = {att.filename: att for att in image_atts}
+        by_stem = {att.filename.rsplit('.', 1)[0]: att for att in image_atts}
+
+        def match_attachment(cid):
+            cid_clean = cid.split('@')[0]
+            att = (by_filename.get(cid) or by_filename.get(cid_clean) or
+                   by_stem.get(cid) or by_stem.get(cid_clean))
+            if att:
+                return att
+            for att in image_atts:
+                filename = att.filename
+                filename_without_ext = filename.rsplit('.', 1)[0]
+                if (cid in filename or
+                    filename in cid or
+                    cid_clean in filename or
+                    filename_without_ext in cid):
+                    return att
+            return None
+
         print(f'\n🔗 Matching cid to attachments:')
+        inline_matched = set()
         for cid in sorted(unique_cids):
-            matched = False
-            for att in target.attachments:
-                if att.content_type.startswith('image/'):
-                    filename = att.filename
-                    filename_without_ext = filename.rsplit('.', 1)[0] if '.' in filename else filename
-                    cid_clean = cid.split('@')[0] if '@' in cid else cid
-
-                    if (cid in filename or
-                        filename in cid or
-                        cid_clean in filename or
-                        filename_without_ext in cid):
-                        print(f'  ✅ cid:{cid} -> {filename}')
-                        matched = True
-                        break
-
-            if not matched:
+            att = match_attachment(cid)
+            if att:
+                print(f'  ✅ cid:{cid} -> {att.filename}')
+                inline_matched.add(att.filename)
+            else:
                 print(f'  ❌ cid:{cid} -> NO MATCH')
 
-        # 检查哪些图片不是内联的
+        # 检查哪些图片不是内联的（复用上面的匹配结果）
         print(f'\n📷 Non-inline image attachments:')
-        inline_matched = set()
-        for cid in unique_cids:
-            for att in target.attachments:
-                if att.content_type.startswith('image/'):
-                    filename = att.filename
-                    filename_without_ext = filename.rsplit('.', 1)[0] if '.' in filename else filename
-                    cid_clean = cid.split('@')[0] if '@' in cid else cid
-
-                    if (cid in filename or
-                        filename in cid or
-                        cid_clean in filename or
-                        filename_without_ext in cid):
-                        inline_matched.add(filename)
-
         for att in target.attachments:
             if att.content_type.startswith('image/') and att.filename not in inline_matched:
                 print(f'  - {att.filename} (regular attachment)')
@@ -4,14 +4,27 @@
 """
 
 import asyncio
-import json
+import orjson
+import sqlite3
 import sys
 from pathlib import Path
 from datetime import datetime
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.config import config
+from src.notion.page_view import get_property_ids, iter_database_pages, parse_page
+from src.notion.rate_limit import create_rate_limited_client
+
+
+# AppleScript 缓存及其 SQLite 索引
+CACHE_FILE = Path(__file__).parent.parent / "data" / "applescript_cache.json"
+CACHE_INDEX_FILE = Path(__file__).parent.parent / "data" / "applescript_cache.db"
+
+# IN (...) 查询每批参数个数（低于 SQLite 默认变量上限 999）
+SQL_IN_BATCH_SIZE = 500
 
 
 class Colors:
@@ -23,132 +36,129 @@ class Colors:
     BOLD = '\033[1m'
 
 
+def open_cache_index(cache_file: Path, index_file: Path = CACHE_INDEX_FILE) -> sqlite3.Connection:
+    """打开 AppleScript 缓存的 SQLite 索引（message_id → date_received）
+
+    索引记录源 JSON 的 mtime，JSON 更新后重建；之后的查询只读磁盘索引，
+    不在内存中常驻完整缓存。
+    """
+    conn = sqlite3.connect(str(index_file))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS cache (message_id TEXT PRIMARY KEY, date_received TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    source_mtime = str(cache_file.stat().st_mtime_ns)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'source_mtime'").fetchone()
+    if row is None or row[0] != source_mtime:
+        as_cache = orjson.loads(cache_file.read_bytes())
+        with conn:
+            conn.execute("DELETE FROM cache")
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (message_id, date_received) VALUES (?, ?)",
+                ((mid, (email.get('date_received') or '')[:10] or None) for mid, email in as_cache.items())
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('source_mtime', ?)", (source_mtime,))
+        del as_cache
+    return conn
+
+
+def find_cached_ids(conn: sqlite3.Connection, message_ids: list) -> set:
+    """返回 message_ids 中存在于缓存索引的部分（IN (...) 分批查询）"""
+    found = set()
+    for i in range(0, len(message_ids), SQL_IN_BATCH_SIZE):
+        batch = message_ids[i:i + SQL_IN_BATCH_SIZE]
+        placeholders = ",".join("?" * len(batch))
+        found.update(row[0] for row in conn.execute(
+            f"SELECT message_id FROM cache WHERE message_id IN ({placeholders})", batch
+        ))
+    return found
+
+
 async def main():
-    from notion_client import AsyncClient
-    client = AsyncClient(auth=config.notion_token)
+    client = create_rate_limited_client()
 
     # 查询没有 Row ID 或 Conversation ID 的邮件
     print(f"{Colors.BOLD}查询缺失 Row ID 或 Conversation ID 的邮件...{Colors.ENDC}\n")
 
-    missing_pages = []
-
-    # 查询 Row ID 为空的
-    has_more = True
-    start_cursor = None
-
-    while has_more:
-        query_params = {
-            "database_id": config.email_database_id,
-            "filter": {
+    filter_properties = await get_property_ids(
+        client, config.email_database_id,
+        ["Subject", "Message ID", "Date", "From", "Row ID", "Conversation ID"]
+    )
+
+    # 查询 Row ID 或 Conversation ID 为空的
+    missing_pages = [
+        parse_page(page) async for page in iter_database_pages(
+            client,
+            database_id=config.email_database_id,
+            filter={
                 "or": [
                     {"property": "Row ID", "number": {"is_empty": True}},
                     {"property": "Conversation ID", "number": {"is_empty": True}}
                 ]
             },
-            "page_size": 100
-        }
-        if start_cursor:
-            query_params["start_cursor"] = start_cursor
-
-        results = await client.databases.query(**query_params)
-
-        for page in results.get("results", []):
-            props = page.get("properties", {})
-
-            # 提取信息
-            row_id = props.get("Row ID", {}).get("number")
-            conv_id = props.get("Conversation ID", {}).get("number")
-
-            subj_texts = props.get("Subject", {}).get("title", [])
-            subject = subj_texts[0].get("text", {}).get("content", "") if subj_texts else ""
-
-            msg_id_texts = props.get("Message ID", {}).get("rich_text", [])
-            message_id = msg_id_texts[0].get("text", {}).get("content", "") if msg_id_texts else ""
-
-            date_val = props.get("Date", {}).get("date", {})
-            date_str = date_val.get("start", "") if date_val else ""
-
-            sender = props.get("From", {}).get("email", "")
-
-            created_time = page.get("created_time", "")
-
-            missing_pages.append({
-                "page_id": page["id"],
-                "subject": subject,
-                "message_id": message_id,
-                "date": date_str,
-                "sender": sender,
-                "row_id": row_id,
-                "conv_id": conv_id,
-                "created_time": created_time
-            })
-
-        has_more = results.get("has_more", False)
-        start_cursor = results.get("next_cursor")
+            page_size=100,
+            filter_properties=filter_properties
+        )
+    ]
 
     print(f"共找到 {len(missing_pages)} 封缺失 ID 的邮件\n")
     print("=" * 80)
 
-    # 加载 AppleScript 缓存
-    cache_file = Path(__file__).parent.parent / "data" / "applescript_cache.json"
-    as_cache = {}
-    if cache_file.exists():
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            as_cache = json.load(f)
-        print(f"AppleScript 缓存: {len(as_cache)} 封邮件")
-
-        # 获取缓存的日期范围
-        dates = []
-        for email in as_cache.values():
-            date_str = email.get('date_received', '')
-            if date_str:
-                dates.append(date_str[:10])
-        if dates:
-            print(f"缓存日期范围: {min(dates)} ~ {max(dates)}")
+    # 加载 AppleScript 缓存（只查询本次用到的 message_id）
+    as_cache = set()
+    min_date = max_date = None
+    if CACHE_FILE.exists():
+        conn = open_cache_index(CACHE_FILE)
+        as_cache = find_cached_ids(conn, [page.message_id for page in missing_pages if page.message_id])
+        (cache_count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        min_date, max_date = conn.execute("SELECT MIN(date_received), MAX(date_received) FROM cache").fetchone()
+        conn.close()
+        print(f"AppleScript 缓存: {cache_count} 封邮件")
+
+        # 缓存的日期范围
+        if min_date:
+            print(f"缓存日期范围: {min_date} ~ {max_date}")
 
     print("=" * 80 + "\n")
 
     # 分析每封邮件
     for i, page in enumerate(missing_pages, 1):
         print(f"{Colors.BOLD}[{i}/{len(missing_pages)}]{Colors.ENDC}")
-        print(f"  主题: {page['subject'][:60]}{'...' if len(page['subject']) > 60 else ''}")
-        print(f"  发件人: {page['sender']}")
-        print(f"  日期: {page['date']}")
-        print(f"  Message ID: {page['message_id'][:50]}{'...' if len(page['message_id']) > 50 else ''}")
-        print(f"  Row ID: {page['row_id']}, Conversation ID: {page['conv_id']}")
-        print(f"  创建时间: {page['created_time']}")
+        print(f"  主题: {page.subject[:60]}{'...' if len(page.subject) > 60 else ''}")
+        print(f"  发件人: {page.sender}")
+        print(f"  日期: {page.date}")
+        print(f"  Message ID: {page.message_id[:50]}{'...' if len(page.message_id) > 50 else ''}")
+        print(f"  Row ID: {page.row_id}, Conversation ID: {page.conv_id}")
+        print(f"  创建时间: {page.created_time}")
 
         # 分析原因
         reasons = []
 
         # 1. 检查是否在 AppleScript 缓存中
-        if page['message_id'] and page['message_id'] in as_cache:
+        if page.message_id and page.message_id in as_cache:
             reasons.append(f"{Colors.GREEN}✓ 在 AppleScript 缓存中{Colors.ENDC}")
         else:
             reasons.append(f"{Colors.RED}✗ 不在 AppleScript 缓存中{Colors.ENDC}")
 
             # 检查日期是否在缓存范围内
-            if page['date']:
-                page_date = page['date'][:10]
-                if as_cache:
-                    dates = [e.get('date_received', '')[:10] for e in as_cache.values() if e.get('date_received')]
-                    if dates:
-                        min_date, max_date = min(dates), max(dates)
-                        if page_date < min_date:
-                            reasons.append(f"{Colors.YELLOW}  → 日期 {page_date} 早于缓存范围 {min_date}{Colors.ENDC}")
-                        elif page_date > max_date:
-                            reasons.append(f"{Colors.YELLOW}  → 日期 {page_date} 晚于缓存范围 {max_date}{Colors.ENDC}")
-                        else:
-                            reasons.append(f"{Colors.YELLOW}  → 日期在缓存范围内但未找到匹配{Colors.ENDC}")
+            if page.date and min_date:
+                page_date = page.date[:10]
+                if page_date < min_date:
+                    reasons.append(f"{Colors.YELLOW}  → 日期 {page_date} 早于缓存范围 {min_date}{Colors.ENDC}")
+                elif page_date > max_date:
+                    reasons.append(f"{Colors.YELLOW}  → 日期 {page_date} 晚于缓存范围 {max_date}{Colors.ENDC}")
+                else:
+                    reasons.append(f"{Colors.YELLOW}  → 日期在缓存范围内但未找到匹配{Colors.ENDC}")
 
         # 2. 检查 Message ID 格式
-        if not page['message_id']:
+        if not page.message_id:
             reasons.append(f"{Colors.RED}✗ 没有 Message ID{Colors.ENDC}")
-        elif '@' not in page['message_id']:
+        elif '@' not in page.message_id:
             reasons.append(f"{Colors.YELLOW}⚠ Message ID 格式异常 (无 @){Colors.ENDC}")
 
         # 3. 检查发件人
-        if not page['sender']:
+        if not page.sender:
             reasons.append(f"{Colors.YELLOW}⚠ 没有发件人邮箱{Colors.ENDC}")
 
         for reason in reasons:
@@ -160,8 +170,8 @@ async def main():
     print("=" * 80)
     print(f"{Colors.BOLD}统计分析:{Colors.ENDC}")
 
-    in_cache = sum(1 for p in missing_pages if p['message_id'] in as_cache)
-    no_msg_id = sum(1 for p in missing_pages if not p['message_id'])
+    in_cache = sum(1 for p in missing_pages if p.message_id in as_cache)
+    no_msg_id = sum(1 for p in missing_pages if not p.message_id)
 
     print(f"  在缓存中: {in_cache}")
     print(f"  不在缓存中: {len(missing_pages) - in_cache}")
@@ -170,7 +180,7 @@ async def main():
     # 按发件人域名分组
     domains = {}
     for p in missing_pages:
-        sender = p['sender'] or ''
+        sender = p.sender or ''
         if '@' in sender:
             domain = sender.split('@')[1]
         else:
@@ -3,14 +3,16 @@ import asyncio
 import json
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
-from notion_client import AsyncClient
 from src.config import config
+from src.notion.rate_limit import create_rate_limited_client
 
 async def main():
     """检查 Notion Database 字段结构"""
-    client = AsyncClient(auth=config.notion_token)
+    client = create_rate_limited_client()
 
     print("=" * 60)
     print("Notion Database 字段检查")
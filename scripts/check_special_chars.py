@@ -2,7 +2,9 @@ import sys
 import asyncio
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.utils.logger import setup_logger
 from src.config import config
@@ -29,20 +31,20 @@ async def main():
         block_type = block.get("type", "unknown")
 
         text = ""
-        try:
-            if block_type == "paragraph":
-                text = block["paragraph"]["rich_text"][0]["text"]["content"]
-        except:
-            continue
+        if block_type == "paragraph":
+            rich_text = block["paragraph"].get("rich_text") or []
+            if rich_text:
+                text = rich_text[0].get("text", {}).get("content", "")
 
-        if len(text) > 1900:
-            print(f"\nBlock {i}: {len(text)} chars")
+        n = len(text)
+        if n > 1900:
+            print(f"\nBlock {i}: {n} chars")
 
             # 检查不同编码下的长度
             utf8_len = len(text.encode('utf-8'))
-            utf16_len = len(text.encode('utf-16')) // 2  # UTF-16使用2字节单元
+            utf16_len = n + sum(1 for c in text if ord(c) > 0xFFFF)  # BMP 外字符占 2 个 UTF-16 单元
 
-            print(f"  Python len():      {len(text)}")
+            print(f"  Python len():      {n}")
             print(f"  UTF-8 bytes:       {utf8_len}")
             print(f"  UTF-16 code units: {utf16_len}")
 
@@ -51,8 +53,8 @@ async def main():
             print(f"  Emoji/特殊字符:    {emoji_count}")
 
             # 如果超过2000，显示具体超出情况
-            if len(text) > 2000:
-                print(f"  ❌ Python长度超出: {len(text) - 2000}")
+            if n > 2000:
+                print(f"  ❌ Python长度超出: {n - 2000}")
             if utf8_len > 2000:
                 print(f"  ❌ UTF-8超出: {utf8_len - 2000}")
             if utf16_len > 2000:
@@ -11,72 +11,39 @@ import asyncio
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
+from typing import AsyncIterator
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from notion_client import AsyncClient
 from src.config import config
+from src.notion.page_view import PageInfo, get_property_ids, iter_database_pages, parse_page
+from src.notion.rate_limit import NOTION_MAX_CONCURRENCY, create_rate_limited_client, with_backoff
 
 
-async def get_all_pages(client: AsyncClient, database_id: str):
-    """获取数据库中所有页面（处理分页）"""
-    all_pages = []
-    has_more = True
-    start_cursor = None
+async def iter_all_pages(client: AsyncClient, database_id: str) -> AsyncIterator[dict]:
+    """逐个产出数据库中的所有页面（处理分页，不在内存中累积）"""
+    count = 0
+    async for page in iter_database_pages(
+        client,
+        database_id=database_id,
+        page_size=100,
+        filter_properties=await get_property_ids(client, database_id, ["Message ID", "Subject"])
+    ):
+        yield page
+        count += 1
+        if count % 100 == 0:
+            print(f"已获取 {count} 条记录...", end="\r")
 
-    while has_more:
-        query_params = {"database_id": database_id, "page_size": 100}
-        if start_cursor:
-            query_params["start_cursor"] = start_cursor
-
-        response = await client.databases.query(**query_params)
-        all_pages.extend(response.get("results", []))
-
-        has_more = response.get("has_more", False)
-        start_cursor = response.get("next_cursor")
-
-        print(f"已获取 {len(all_pages)} 条记录...", end="\r")
-
-    print(f"共获取 {len(all_pages)} 条记录         ")
-    return all_pages
-
-
-def extract_page_info(page: dict) -> dict:
-    """从页面中提取关键信息"""
-    properties = page.get("properties", {})
-
-    # 提取 Message ID
-    message_id_prop = properties.get("Message ID", {})
-    message_id = None
-    if message_id_prop.get("type") == "rich_text":
-        rich_text = message_id_prop.get("rich_text", [])
-        if rich_text:
-            message_id = rich_text[0].get("plain_text", "")
-
-    # 提取标题 (Subject)
-    title_prop = properties.get("Subject", {})
-    title = ""
-    if title_prop.get("type") == "title":
-        title_list = title_prop.get("title", [])
-        if title_list:
-            title = title_list[0].get("plain_text", "")
-
-    # 提取创建时间
-    created_time = page.get("created_time", "")
-
-    return {
-        "page_id": page["id"],
-        "message_id": message_id,
-        "title": title,
-        "created_time": created_time,
-        "url": page.get("url", "")
-    }
+    print(f"共获取 {count} 条记录         ")
 
 
 async def archive_page(client: AsyncClient, page_id: str) -> bool:
-    """归档（删除）页面"""
+    """归档（删除）页面（429 / 5xx 自动重试）"""
     try:
-        await client.pages.update(page_id=page_id, archived=True)
+        await with_backoff(lambda: client.pages.update(page_id=page_id, archived=True))
         return True
     except Exception as e:
         print(f"  ❌ 归档失败 {page_id}: {e}")
@@ -90,19 +57,16 @@ async def main():
     print(f"Database ID: {config.email_database_id}")
     print()
 
-    client = AsyncClient(auth=config.notion_token)
+    client = create_rate_limited_client()
 
-    # 获取所有页面
+    # 流式获取所有页面，只保留提取后的关键信息
     print("正在获取所有页面...")
-    pages = await get_all_pages(client, config.email_database_id)
-
-    # 收集 Message ID 信息
-    message_id_map = defaultdict(list)  # message_id -> [page_info, ...]
+    message_id_map = defaultdict(list)  # message_id -> [PageInfo, ...]
 
-    for page in pages:
-        info = extract_page_info(page)
-        if info["message_id"]:
-            message_id_map[info["message_id"]].append(info)
+    async for page in iter_all_pages(client, config.email_database_id):
+        info = parse_page(page)
+        if info.message_id:
+            message_id_map[info.message_id].append(info)
 
     # 找出重复的
     duplicates = {mid: entries for mid, entries in message_id_map.items() if len(entries) > 1}
@@ -138,28 +102,29 @@ async def main():
     print("开始清理...")
     print("=" * 70)
 
-    deleted_count = 0
-    failed_count = 0
-
+    to_delete = []
     for i, (message_id, entries) in enumerate(duplicates.items(), 1):
         # 按创建时间排序，保留最早的
-        sorted_entries = sorted(entries, key=lambda x: x["created_time"])
+        sorted_entries = sorted(entries, key=lambda x: x.created_time)
         keep = sorted_entries[0]
-        to_delete = sorted_entries[1:]
 
         print(f"\n[{i}/{total_duplicates}] Message ID: {message_id[:50]}...")
-        print(f"  保留: {keep['title'][:40]}... (创建于 {keep['created_time'][:19]})")
-
-        for entry in to_delete:
-            print(f"  删除: {entry['title'][:40]}... (创建于 {entry['created_time'][:19]})")
-            success = await archive_page(client, entry["page_id"])
-            if success:
-                deleted_count += 1
-            else:
-                failed_count += 1
-
-            # 避免请求过快
-            await asyncio.sleep(0.3)
+        print(f"  保留: {keep.subject[:40]}... (创建于 {keep.created_time[:19]})")
+        for entry in sorted_entries[1:]:
+            print(f"  删除: {entry.subject[:40]}... (创建于 {entry.created_time[:19]})")
+        to_delete.extend(sorted_entries[1:])
+
+    # 并发归档（请求速率由客户端传输层限制）
+    print(f"\n正在归档 {len(to_delete)} 个页面...")
+    semaphore = asyncio.Semaphore(NOTION_MAX_CONCURRENCY)
+
+    async def archive(entry: PageInfo) -> bool:
+        async with semaphore:
+            return await archive_page(client, entry.page_id)
+
+    results = await asyncio.gather(*(archive(entry) for entry in to_delete))
+    deleted_count = sum(results)
+    failed_count = len(results) - deleted_count
 
     print()
     print("=" * 70)
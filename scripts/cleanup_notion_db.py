@@ -18,18 +18,49 @@ Notion 邮件数据库清理脚本
 
     # 全部执行
     python3 scripts/cleanup_notion_db.py
+
+    # 忽略增量检查点，全量扫描
+    python3 scripts/cleanup_notion_db.py --full
+
+    # 预览并把操作写入计划文件，之后只执行计划（不重新扫描，可中断后续跑）
+    python3 scripts/cleanup_notion_db.py --dry-run --emit-plan data/cleanup_plan.jsonl
+    python3 scripts/cleanup_notion_db.py --apply-plan data/cleanup_plan.jsonl
+
+增量扫描：
+    每次运行结束后将页面数据和最大 last_edited_time 保存到 data/cleanup_page_index.db，
+    下次运行只查询此后编辑过的页面，与缓存合并（只写入本次获取或归档的页面）。
+    在其他地方删除（归档）的页面不会出现在增量结果中：Step 1 的保留页和 Step 2 的父页面
+    若只来自缓存，写入前会用 pages.retrieve 确认仍然存在，已归档的页面从缓存中移除。
+
+计划文件：
+    每行一个操作 {"op": "archive" | "remove_parent" | "set_parent", "page_id": ..., ...}。
+    执行时每完成一个操作就把 "op:page_id" 追加到 <计划文件>.done 并 fsync，
+    重新执行同一计划会跳过已完成的操作。
 """
 
 import argparse
 import asyncio
+import os
+import sqlite3
 import sys
-from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Callable, Dict, List, Optional
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
+import orjson
+from notion_client import APIErrorCode, APIResponseError
 from src.config import config
+from src.notion.page_view import get_property_ids, iter_database_pages, parse_page
+from src.notion.rate_limit import NOTION_MAX_CONCURRENCY, create_rate_limited_client, with_backoff
+
+
+PAGE_INDEX_FILE = Path("data/cleanup_page_index.db")
+
+# 页面索引中保存的字段（与 fetch_all_pages 生成的 page_data 一致）
+PAGE_FIELDS = ("page_id", "created_time", "message_id", "thread_id", "subject", "parent_id")
 
 
 class Colors:
@@ -48,19 +79,98 @@ def print_header(text: str):
 
 
 def print_success(text: str):
-    print(f"{Colors.GREEN}✓ {text}{Colors.ENDC}", flush=True)
+    print(f"{Colors.GREEN}✓ {text}{Colors.ENDC}")
 
 
 def print_error(text: str):
-    print(f"{Colors.RED}✗ {text}{Colors.ENDC}", flush=True)
+    print(f"{Colors.RED}✗ {text}{Colors.ENDC}")
 
 
 def print_warning(text: str):
-    print(f"{Colors.YELLOW}⚠ {text}{Colors.ENDC}", flush=True)
+    print(f"{Colors.YELLOW}⚠ {text}{Colors.ENDC}")
 
 
 def print_info(text: str):
-    print(f"{Colors.CYAN}ℹ {text}{Colors.ENDC}", flush=True)
+    print(f"{Colors.CYAN}ℹ {text}{Colors.ENDC}")
+
+
+def plan_update_kwargs(item: Dict) -> Dict:
+    """计划操作 -> pages.update 的关键字参数"""
+    if item["op"] == "archive":
+        return {"archived": True}
+    if item["op"] == "remove_parent":
+        return {"properties": {"Parent Item": {"relation": []}}}  # 清空关联
+    return {"properties": {"Parent Item": {"relation": [{"id": item["parent_page_id"]}]}}}
+
+
+def plan_key(item: Dict) -> str:
+    return f"{item['op']}:{item['page_id']}"
+
+
+class PageIndex:
+    """页面索引缓存（精简页面数据 + 增量扫描检查点）
+
+    保存时只写入本次获取或归档的页面，不重写整个缓存。
+    """
+
+    def __init__(self, path: Path = PAGE_INDEX_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id TEXT PRIMARY KEY,
+                created_time TEXT,
+                message_id TEXT,
+                thread_id TEXT,
+                subject TEXT,
+                parent_id TEXT
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_message_id ON pages(message_id)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def load(self) -> tuple:
+        """读取缓存
+
+        Returns:
+            (last_edited_time, [page_data, ...])，没有检查点时为 (None, [])
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'last_edited_time'").fetchone()
+        if not row:
+            return None, []
+        rows = self.conn.execute(f"SELECT {', '.join(PAGE_FIELDS)} FROM pages").fetchall()
+        return row[0], [dict(zip(PAGE_FIELDS, r)) for r in rows]
+
+    def save(self, last_edited_time: str, pages: List[Dict], removed_ids: set, reset: bool = False):
+        """在一个事务中写入变化的页面并更新检查点
+
+        Args:
+            pages: 本次获取到的页面（新增或覆盖）
+            removed_ids: 本次归档的页面 ID
+            reset: 先清空缓存（全量扫描）
+        """
+        with self.conn:
+            if reset:
+                self.conn.execute("DELETE FROM pages")
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO pages ({', '.join(PAGE_FIELDS)}) VALUES ({', '.join('?' * len(PAGE_FIELDS))})",
+                [tuple(p[f] for f in PAGE_FIELDS) for p in pages]
+            )
+            self.conn.executemany("DELETE FROM pages WHERE page_id = ?", [(pid,) for pid in removed_ids])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_edited_time', ?)",
+                (last_edited_time,)
+            )
+
+    def remove(self, page_ids: set):
+        """删除已归档的页面（不更新检查点）"""
+        with self.conn:
+            self.conn.executemany("DELETE FROM pages WHERE page_id = ?", [(pid,) for pid in page_ids])
+
+    def close(self):
+        self.conn.close()
 
 
 class NotionDBCleaner:
@@ -70,9 +180,24 @@ class NotionDBCleaner:
         self.notion_client = None
         self.all_pages: List[Dict] = []
 
+        # 本次扫描到的最大 last_edited_time（运行结束后写入检查点）
+        self.last_edited_time: Optional[str] = None
+
         # message_id -> page 映射（用于 Parent Item 查找）
         self.message_id_to_page: Dict[str, Dict] = {}
 
+        # 页面索引缓存：本次获取的页面、归档的页面 ID，运行结束时写回（首次使用时打开）
+        self._page_index: Optional[PageIndex] = None
+        self._fetched_pages: Dict[str, Dict] = {}
+        self._archived_ids: set = set()
+        self._reset_index = False
+
+        # 预览模式下生成的操作计划（--emit-plan）
+        self.plan: List[Dict] = []
+
+        # 批量写入时限制同时在途的请求数（速率由客户端传输层限制）
+        self._semaphore = asyncio.Semaphore(NOTION_MAX_CONCURRENCY)
+
         # 统计
         self.stats = {
             "total_pages": 0,
@@ -85,10 +210,22 @@ class NotionDBCleaner:
             "errors": 0
         }
 
+    @property
+    def page_index(self) -> PageIndex:
+        """页面索引（首次访问时才创建数据库文件）"""
+        if self._page_index is None:
+            self._page_index = PageIndex()
+        return self._page_index
+
+    def close_page_index(self):
+        """关闭页面索引（未打开过则跳过）"""
+        if self._page_index is not None:
+            self._page_index.close()
+            self._page_index = None
+
     async def init_notion(self) -> bool:
         try:
-            from notion_client import AsyncClient
-            self.notion_client = AsyncClient(auth=config.notion_token)
+            self.notion_client = create_rate_limited_client()
             await self.notion_client.databases.retrieve(database_id=config.email_database_id)
             print_success("Notion 连接成功")
             return True
@@ -96,140 +233,264 @@ class NotionDBCleaner:
             print_error(f"Notion 连接失败: {e}")
             return False
 
-    async def fetch_all_pages(self):
-        """获取所有 Notion 页面"""
-        print_info("获取所有 Notion 页面...")
+    def save_checkpoint(self):
+        """保存增量检查点（本次变化的页面 + 最大 last_edited_time）"""
+        if not self.last_edited_time:
+            return
+        pages = [p for pid, p in self._fetched_pages.items() if pid not in self._archived_ids]
+        self.page_index.save(self.last_edited_time, pages, self._archived_ids, reset=self._reset_index)
 
-        self.all_pages = []
-        self.message_id_to_page = {}
-        has_more = True
-        start_cursor = None
+    async def iter_pages(self, edited_since: Optional[str] = None) -> AsyncIterator[Dict]:
+        """逐个产出数据库页面（按创建时间从旧到新，处理分页，不在内存中累积）
 
-        while has_more:
-            query_params = {
-                "database_id": config.email_database_id,
-                "page_size": 100,
-                "sorts": [{"timestamp": "created_time", "direction": "ascending"}]  # 从旧到新
+        Args:
+            edited_since: 只返回此时间之后编辑过的页面（增量扫描）
+        """
+        query_params = {
+            "database_id": config.email_database_id,
+            "page_size": 100,
+            "filter_properties": await get_property_ids(
+                self.notion_client, config.email_database_id,
+                ["Message ID", "Thread ID", "Subject", "Parent Item"]
+            ),
+            "sorts": [{"timestamp": "created_time", "direction": "ascending"}]  # 从旧到新
+        }
+        if edited_since:
+            query_params["filter"] = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": edited_since}
             }
-            if start_cursor:
-                query_params["start_cursor"] = start_cursor
 
-            results = await self.notion_client.databases.query(**query_params)
+        async for page in iter_database_pages(self.notion_client, **query_params):
+            yield page
 
-            for page in results.get("results", []):
-                props = page.get("properties", {})
+    async def fetch_all_pages(self, full: bool = False):
+        """获取所有 Notion 页面
 
-                # 提取 Message ID
-                msg_id_texts = props.get("Message ID", {}).get("rich_text", [])
-                message_id = msg_id_texts[0].get("text", {}).get("content", "") if msg_id_texts else ""
+        Args:
+            full: 忽略检查点，全量扫描
+        """
+        edited_since, cached_pages = (None, []) if full else self.page_index.load()
+        if full:
+            self._reset_index = True
+
+        # page_id -> page_data，先放入缓存中的页面，再由增量结果覆盖
+        pages_by_id: Dict[str, Dict] = {p["page_id"]: p for p in cached_pages}
+        self.last_edited_time = edited_since
+        if edited_since:
+            print_info(f"获取 {edited_since} 之后编辑过的 Notion 页面（缓存 {len(pages_by_id)} 个）...")
+        else:
+            print_info("获取所有 Notion 页面...")
+
+        fetched = 0
+
+        async for page in self.iter_pages(edited_since):
+            info = parse_page(page)
+            last_edited = page.get("last_edited_time", "")
+
+            # 只保留精简字段，原始页面 JSON 处理完即释放
+            page_data = {
+                "page_id": info.page_id,
+                "created_time": info.created_time,
+                "message_id": info.message_id,
+                "thread_id": info.thread_id,
+                "subject": info.subject,
+                "parent_id": info.parent_id
+            }
 
-                # 提取 Thread ID
-                thread_id_texts = props.get("Thread ID", {}).get("rich_text", [])
-                thread_id = thread_id_texts[0].get("text", {}).get("content", "") if thread_id_texts else ""
+            pages_by_id[page["id"]] = page_data
+            self._fetched_pages[page["id"]] = page_data
+            fetched += 1
+            if fetched % 100 == 0:
+                print(f"\r  已获取 {fetched} 个页面...", end="", flush=True)
 
-                # 提取 Subject
-                subj_texts = props.get("Subject", {}).get("title", [])
-                subject = subj_texts[0].get("text", {}).get("content", "") if subj_texts else ""
+            if last_edited and (not self.last_edited_time or last_edited > self.last_edited_time):
+                self.last_edited_time = last_edited
 
-                # 提取 Parent Item
-                parent_rel = props.get("Parent Item", {}).get("relation", [])
-                parent_id = parent_rel[0].get("id") if parent_rel else None
+        print(f"\r  已获取 {fetched} 个页面    ")
 
-                page_data = {
-                    "page_id": page["id"],
-                    "created_time": page.get("created_time", ""),
-                    "message_id": message_id,
-                    "thread_id": thread_id,
-                    "subject": subject,
-                    "parent_id": parent_id
-                }
+        # 从旧到新排列，建立 message_id -> page 映射（用于 Parent Item 查找）
+        self.all_pages = sorted(pages_by_id.values(), key=lambda p: p["created_time"])
+        self.message_id_to_page = {p["message_id"]: p for p in self.all_pages if p["message_id"]}
+        self.stats["total_pages"] = len(self.all_pages)
 
-                self.all_pages.append(page_data)
+    async def _update_pages(
+        self,
+        updates: List[tuple],
+        action: str,
+        on_done: Optional[Callable[[Dict], None]] = None
+    ) -> int:
+        """并发更新页面
+
+        Args:
+            updates: [(page, pages.update 的关键字参数), ...]
+            action: 操作名称（用于日志）
+            on_done: 每个页面更新成功后的回调
+
+        Returns:
+            成功数
+        """
+        done = 0
 
-                # 建立 message_id -> page 映射（用于 Parent Item 查找）
-                if message_id:
-                    self.message_id_to_page[message_id] = page_data
+        async def update(page: Dict, kwargs: Dict) -> bool:
+            nonlocal done
+            async with self._semaphore:
+                try:
+                    await with_backoff(
+                        lambda: self.notion_client.pages.update(page_id=page["page_id"], **kwargs)
+                    )
+                except Exception as e:
+                    print_error(f"{action}失败: {e}")
+                    self.stats["errors"] += 1
+                    return False
+            done += 1
+            if on_done:
+                on_done(page)
+            # 单行进度，每 20 条刷新一次
+            if done % 20 == 0:
+                print(f"\r  已{action} {done}/{len(updates)}...", end="", flush=True)
+            return True
 
-            has_more = results.get("has_more", False)
-            start_cursor = results.get("next_cursor")
-            print(f"\r  已获取 {len(self.all_pages)} 个页面...", end="", flush=True)
+        results = await asyncio.gather(*(update(page, kwargs) for page, kwargs in updates))
+        print(f"\r  已{action} {done}/{len(updates)}    ", flush=True)
+        return sum(results)
 
-        print(f"\r  已获取 {len(self.all_pages)} 个页面    ")
-        self.stats["total_pages"] = len(self.all_pages)
+    async def _check_cached_pages(self, pages: List[Dict]) -> tuple:
+        """确认只来自页面索引缓存的页面在 Notion 中仍然存在
 
-    async def step1_dedup(self, dry_run: bool = False):
-        """Step 1: 根据 Message ID 去重"""
-        print_header("Step 1: 去重（按 Message ID）")
+        databases.query 不返回已归档页面，本次重新获取的页面必然存在；
+        缓存中的页面可能已在 Notion 界面或其他工具中被归档，需逐个 pages.retrieve。
+        确认已归档 / 已删除的页面从 all_pages 中移除，并在保存时从页面索引中删除。
+
+        Returns:
+            (dead_ids, unknown_ids)：已不存在的页面 ID、查询失败无法确认的页面 ID
+        """
+        to_check = {p["page_id"] for p in pages if p["page_id"] not in self._fetched_pages}
+        dead_ids: set = set()
+        unknown_ids: set = set()
+        if not to_check:
+            return dead_ids, unknown_ids
+
+        print_info(f"确认 {len(to_check)} 个缓存页面是否仍存在...")
+
+        async def check(page_id: str):
+            async with self._semaphore:
+                try:
+                    page = await with_backoff(lambda: self.notion_client.pages.retrieve(page_id=page_id))
+                except APIResponseError as e:
+                    if e.code == APIErrorCode.ObjectNotFound:
+                        dead_ids.add(page_id)
+                    else:
+                        print_error(f"确认页面失败 {page_id}: {e}")
+                        unknown_ids.add(page_id)
+                    return
+                except Exception as e:
+                    print_error(f"确认页面失败 {page_id}: {e}")
+                    unknown_ids.add(page_id)
+                    return
+            if page.get("archived") or page.get("in_trash"):
+                dead_ids.add(page_id)
+
+        await asyncio.gather(*(check(page_id) for page_id in to_check))
+
+        if dead_ids:
+            print_warning(f"{len(dead_ids)} 个缓存页面已在 Notion 中归档或删除，已从缓存移除")
+            self._archived_ids |= dead_ids
+            self.all_pages = [p for p in self.all_pages if p["page_id"] not in dead_ids]
+        return dead_ids, unknown_ids
+
+    def _split_duplicates(self, skip_msg_ids: set = frozenset()) -> tuple:
+        """按 Message ID 分出保留页和重复页
 
-        # 按 Message ID 分组
-        msg_id_to_pages: Dict[str, List[Dict]] = defaultdict(list)
+        单次遍历：all_pages 已按创建时间从旧到新排列，
+        每个 Message ID 第一次出现的页面即为保留页，之后出现的都是重复页。
 
+        Args:
+            skip_msg_ids: 只确定保留页、不删除重复页的 Message ID
+
+        Returns:
+            (keepers, to_delete)：{message_id: 保留页}、待删除页面列表
+        """
+        keepers: Dict[str, Dict] = {}
+        to_delete: List[Dict] = []
         for page in self.all_pages:
             msg_id = page.get("message_id", "")
-            if msg_id:
-                msg_id_to_pages[msg_id].append(page)
+            if not msg_id:
+                continue
+            if msg_id not in keepers:
+                keepers[msg_id] = page
+            elif msg_id not in skip_msg_ids:
+                to_delete.append(page)
+        return keepers, to_delete
 
-        # 找出重复的
-        duplicates = {k: v for k, v in msg_id_to_pages.items() if len(v) > 1}
+    async def step1_dedup(self, dry_run: bool = False):
+        """Step 1: 根据 Message ID 去重"""
+        print_header("Step 1: 去重（按 Message ID）")
 
-        if not duplicates:
+        keepers, to_delete = self._split_duplicates()
+
+        # 增量模式下保留页可能已在其他地方被归档：重复组中只来自缓存的页面先确认仍然存在，
+        # 否则会保留已归档的页面而把唯一存活的页面删除
+        if to_delete:
+            dup_groups = {p["message_id"] for p in to_delete}
+            dead_ids, unknown_ids = await self._check_cached_pages(
+                [p for p in self.all_pages if p.get("message_id") in dup_groups]
+            )
+            if dead_ids or unknown_ids:
+                # 有页面无法确认状态的重复组本次不删除，下次运行再处理
+                skip_msg_ids = {p["message_id"] for p in self.all_pages if p["page_id"] in unknown_ids}
+                if skip_msg_ids:
+                    print_warning(f"{len(skip_msg_ids)} 个重复的 Message ID 中有页面无法确认状态，本次跳过")
+                keepers, to_delete = self._split_duplicates(skip_msg_ids)
+
+        if not to_delete:
+            self.message_id_to_page = keepers
             print_success("没有发现重复的 Message ID")
             return
 
-        total_dup_pages = sum(len(v) - 1 for v in duplicates.values())  # 每组保留 1 个
+        total_dup_pages = len(to_delete)
         self.stats["duplicates_found"] = total_dup_pages
-        print_warning(f"发现 {len(duplicates)} 个重复的 Message ID，涉及 {total_dup_pages} 个待删除页面")
+        dup_msg_ids = list(dict.fromkeys(p["message_id"] for p in to_delete))
+        print_warning(f"发现 {len(dup_msg_ids)} 个重复的 Message ID，涉及 {total_dup_pages} 个待删除页面")
 
         # 显示示例
         print("\n重复详情（前 5 个）:")
-        for i, (msg_id, pages) in enumerate(list(duplicates.items())[:5]):
-            print(f"\n  Message ID: {msg_id[:50]}... ({len(pages)} 个页面)")
-            # 按创建时间排序（旧的在前）
-            sorted_pages = sorted(pages, key=lambda x: x.get("created_time", ""))
-            for j, p in enumerate(sorted_pages):
-                status = "保留" if j == 0 else "删除"
+        for msg_id in dup_msg_ids[:5]:
+            dup_pages = [p for p in to_delete if p["message_id"] == msg_id]
+            print(f"\n  Message ID: {msg_id[:50]}... ({len(dup_pages) + 1} 个页面)")
+            for status, p in [("保留", keepers[msg_id])] + [("删除", p) for p in dup_pages]:
                 print(f"    [{status}] {p['subject'][:35]}... (created: {p['created_time'][:19]})")
 
         if dry_run:
             print_info(f"预览模式：将删除 {total_dup_pages} 个重复页面")
+            self.plan.extend(
+                {"op": "archive", "page_id": p["page_id"], "subject": p["subject"]} for p in to_delete
+            )
+            # 按删除后的状态预览 Step 2，避免计划中出现对待删除页面的操作
+            deleted_ids = {page["page_id"] for page in to_delete}
+            self.all_pages = [p for p in self.all_pages if p["page_id"] not in deleted_ids]
+            self.message_id_to_page = keepers
             return
 
-        # 执行删除
+        # 执行删除（归档），保留最老的页面
         print_info(f"开始删除 {total_dup_pages} 个重复页面...")
 
-        deleted = 0
-        for msg_id, pages in duplicates.items():
-            # 按创建时间排序，保留最老的
-            sorted_pages = sorted(pages, key=lambda x: x.get("created_time", ""))
-
-            # 删除除第一个之外的所有页面
-            for page in sorted_pages[1:]:
-                try:
-                    await self.notion_client.pages.update(
-                        page_id=page["page_id"],
-                        archived=True  # 归档（软删除）
-                    )
-                    deleted += 1
-                    print(f"  [{deleted}/{total_dup_pages}] 删除: {page['subject'][:40]}...")
-                    await asyncio.sleep(0.1)
-                except Exception as e:
-                    print_error(f"删除失败: {e}")
-                    self.stats["errors"] += 1
+        # 只记录实际归档成功的页面；失败的页面仍留在索引中，下次运行可再次发现
+        deleted_ids = set()
+        deleted = await self._update_pages(
+            [(page, {"archived": True}) for page in to_delete], "删除",
+            on_done=lambda page: deleted_ids.add(page["page_id"])
+        )
 
         self.stats["duplicates_deleted"] = deleted
         print_success(f"已删除 {deleted} 个重复页面")
 
         # 更新 all_pages，移除已删除的
-        deleted_ids = set()
-        for pages in duplicates.values():
-            sorted_pages = sorted(pages, key=lambda x: x.get("created_time", ""))
-            for page in sorted_pages[1:]:
-                deleted_ids.add(page["page_id"])
-
+        self._archived_ids |= deleted_ids
         self.all_pages = [p for p in self.all_pages if p["page_id"] not in deleted_ids]
 
-        # 重建 message_id_to_page 映射
-        self.message_id_to_page = {p["message_id"]: p for p in self.all_pages if p.get("message_id")}
+        # message_id 映射到保留页（归档失败的重复页不覆盖保留页）
+        self.message_id_to_page = keepers
 
     async def step2_set_parent(self, dry_run: bool = False):
         """Step 2: 设置 Parent Item（根据 Thread ID 关联）
@@ -283,6 +544,31 @@ class NotionDBCleaner:
                     "thread_id": thread_id
                 })
 
+        # 父页面只来自缓存时先确认仍然存在，避免关联到已归档的页面
+        if to_set:
+            dead_ids, unknown_ids = await self._check_cached_pages(
+                [self.message_id_to_page[item["page"]["thread_id"]] for item in to_set]
+            )
+            if dead_ids:
+                self.message_id_to_page = {
+                    mid: p for mid, p in self.message_id_to_page.items() if p["page_id"] not in dead_ids
+                }
+                to_remove = [item for item in to_remove if item["page"]["page_id"] not in dead_ids]
+                missing_parents = [item for item in missing_parents if item["page"]["page_id"] not in dead_ids]
+                missing_parents.extend(
+                    {"page": item["page"], "thread_id": item["page"]["thread_id"]}
+                    for item in to_set
+                    if item["parent_page_id"] in dead_ids and item["page"]["page_id"] not in dead_ids
+                )
+            if unknown_ids:
+                print_warning(f"{len(unknown_ids)} 个父页面无法确认状态，本次跳过相关页面")
+            to_set = [
+                item for item in to_set
+                if item["page"]["page_id"] not in dead_ids
+                and item["parent_page_id"] not in dead_ids
+                and item["parent_page_id"] not in unknown_ids
+            ]
+
         # 报告统计
         print_info(f"无 Thread ID（第一封邮件）: {self.stats['no_thread_id']} 个")
         print_info(f"需要设置 Parent: {len(to_set)} 个")
@@ -316,28 +602,28 @@ class NotionDBCleaner:
                     print(f"    → Parent: {item['parent_subject']}...")
             if not to_remove and not to_set:
                 print_success("所有 Parent Item 都已正确设置")
+            self.plan.extend(
+                {"op": "remove_parent", "page_id": item["page"]["page_id"], "subject": item["page"]["subject"]}
+                for item in to_remove
+            )
+            self.plan.extend(
+                {
+                    "op": "set_parent",
+                    "page_id": item["page"]["page_id"],
+                    "subject": item["page"]["subject"],
+                    "parent_page_id": item["parent_page_id"]
+                }
+                for item in to_set
+            )
             return
 
         # 执行移除错误 Parent
         if to_remove:
             print_info(f"\n开始移除 {len(to_remove)} 个页面的错误 Parent Item...")
-            remove_count = 0
-            for item in to_remove:
-                page = item["page"]
-                try:
-                    await self.notion_client.pages.update(
-                        page_id=page["page_id"],
-                        properties={
-                            "Parent Item": {"relation": []}  # 清空关联
-                        }
-                    )
-                    remove_count += 1
-                    if remove_count % 20 == 0:
-                        print(f"  已移除 {remove_count}/{len(to_remove)}...")
-                    await asyncio.sleep(0.1)
-                except Exception as e:
-                    print_error(f"移除 Parent 失败: {e}")
-                    self.stats["errors"] += 1
+            remove_count = await self._update_pages([
+                (item["page"], {"properties": {"Parent Item": {"relation": []}}})  # 清空关联
+                for item in to_remove
+            ], "移除 Parent", on_done=lambda page: self._record_parent(page, None))
 
             self.stats["parent_removed"] = remove_count
             print_success(f"已移除 {remove_count} 个页面的错误 Parent Item")
@@ -345,23 +631,11 @@ class NotionDBCleaner:
         # 执行设置 Parent
         if to_set:
             print_info(f"\n开始设置 {len(to_set)} 个页面的 Parent Item...")
-            set_count = 0
-            for item in to_set:
-                page = item["page"]
-                try:
-                    await self.notion_client.pages.update(
-                        page_id=page["page_id"],
-                        properties={
-                            "Parent Item": {"relation": [{"id": item["parent_page_id"]}]}
-                        }
-                    )
-                    set_count += 1
-                    if set_count % 20 == 0:
-                        print(f"  已设置 {set_count}/{len(to_set)}...")
-                    await asyncio.sleep(0.1)
-                except Exception as e:
-                    print_error(f"设置 Parent 失败: {e}")
-                    self.stats["errors"] += 1
+            new_parents = {item["page"]["page_id"]: item["parent_page_id"] for item in to_set}
+            set_count = await self._update_pages([
+                (item["page"], {"properties": {"Parent Item": {"relation": [{"id": item["parent_page_id"]}]}}})
+                for item in to_set
+            ], "设置 Parent", on_done=lambda page: self._record_parent(page, new_parents[page["page_id"]]))
 
             self.stats["parent_set"] = set_count
             print_success(f"已设置 {set_count} 个页面的 Parent Item")
@@ -369,11 +643,59 @@ class NotionDBCleaner:
         if not to_remove and not to_set:
             print_success("所有 Parent Item 都已正确设置")
 
+    def _record_parent(self, page: Dict, parent_id: Optional[str]):
+        """记录已写入 Notion 的 Parent Item，运行结束时随页面索引保存
+
+        下次运行即使未重新获取该页面，也会按已写入的值比较，不会重复更新。
+        """
+        page["parent_id"] = parent_id
+        self._fetched_pages[page["page_id"]] = page
+
+    def write_plan(self, plan_file: Path):
+        """写入预览模式生成的操作计划（JSON Lines）"""
+        plan_file.parent.mkdir(parents=True, exist_ok=True)
+        plan_file.write_bytes(b"".join(orjson.dumps(item) + b"\n" for item in self.plan))
+        print_success(f"已写入 {len(self.plan)} 个操作到 {plan_file}")
+
+    async def apply_plan(self, plan_file: Path):
+        """执行计划文件中尚未完成的操作（不重新扫描数据库）"""
+        done_file = plan_file.with_name(plan_file.name + ".done")
+        done_keys = set(done_file.read_text().split()) if done_file.exists() else set()
+
+        plan = [orjson.loads(line) for line in plan_file.read_bytes().splitlines() if line.strip()]
+        pending = [item for item in plan if plan_key(item) not in done_keys]
+        print_info(f"计划共 {len(plan)} 个操作，已完成 {len(plan) - len(pending)} 个，待执行 {len(pending)} 个")
+        if not pending:
+            return
+
+        archived_ids = set()
+
+        with open(done_file, "a") as f:
+            def mark_done(item: Dict):
+                f.write(plan_key(item) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                if item["op"] == "archive":
+                    archived_ids.add(item["page_id"])
+
+            applied = await self._update_pages(
+                [(item, plan_update_kwargs(item)) for item in pending], "执行计划", on_done=mark_done
+            )
+
+        print_success(f"已执行 {applied}/{len(pending)} 个操作")
+
+        # 实际归档成功的页面从页面索引中移除（索引不存在时无需处理）
+        if archived_ids and PAGE_INDEX_FILE.exists():
+            self.page_index.remove(archived_ids)
+
     async def run(
         self,
         dry_run: bool = False,
         dedup_only: bool = False,
-        parent_only: bool = False
+        parent_only: bool = False,
+        full: bool = False,
+        emit_plan: Optional[Path] = None,
+        apply_plan: Optional[Path] = None
     ):
         """执行清理"""
         print_header("Notion 邮件数据库清理")
@@ -382,8 +704,14 @@ class NotionDBCleaner:
         if not await self.init_notion():
             return False
 
+        # 只执行已有计划
+        if apply_plan:
+            await self.apply_plan(apply_plan)
+            self.close_page_index()
+            return True
+
         # 获取所有页面
-        await self.fetch_all_pages()
+        await self.fetch_all_pages(full)
 
         # 根据选项决定执行哪些步骤
         run_all = not (dedup_only or parent_only)
@@ -393,14 +721,17 @@ class NotionDBCleaner:
             await self.step1_dedup(dry_run)
 
         # Step 2: 设置 Parent Item
+        # （Step 1 已从 all_pages / message_id_to_page 中移除归档的页面，无需重新获取）
         if run_all or parent_only:
-            # 如果执行了去重，需要重新获取页面
-            if dedup_only and not dry_run:
-                print_info("重新获取页面数据...")
-                await self.fetch_all_pages()
-
             await self.step2_set_parent(dry_run)
 
+        if dry_run and emit_plan:
+            self.write_plan(emit_plan)
+
+        # 保存检查点（已归档的页面从缓存中移除）
+        self.save_checkpoint()
+        self.close_page_index()
+
         # 统计
         print_header("清理完成")
         print(f"""
@@ -428,14 +759,23 @@ async def main():
     parser.add_argument("--dry-run", action="store_true", help="预览模式，不实际执行")
     parser.add_argument("--dedup-only", action="store_true", help="只执行去重")
     parser.add_argument("--parent-only", action="store_true", help="只执行 Parent Item 设置")
+    parser.add_argument("--full", action="store_true", help="忽略增量检查点，全量扫描")
+    parser.add_argument("--emit-plan", type=Path, help="预览模式下把操作写入计划文件（JSON Lines）")
+    parser.add_argument("--apply-plan", type=Path, help="只执行计划文件中尚未完成的操作")
 
     args = parser.parse_args()
 
+    if args.apply_plan and (args.dry_run or args.emit_plan):
+        parser.error("--apply-plan 会实际修改 Notion，不能与 --dry-run / --emit-plan 同时使用")
+
     cleaner = NotionDBCleaner()
     await cleaner.run(
-        dry_run=args.dry_run,
+        dry_run=args.dry_run or args.emit_plan is not None,  # --emit-plan 隐含预览模式
         dedup_only=args.dedup_only,
-        parent_only=args.parent_only
+        parent_only=args.parent_only,
+        full=args.full,
+        emit_plan=args.emit_plan,
+        apply_plan=args.apply_plan
     )
 
 
@@ -25,12 +25,18 @@ import argparse
 import sys
 from pathlib import Path
 
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
+import orjson
 from src.mail.sync_store import SyncStore
 
 
+# reset_sync_status 每个事务更新的行数
+RESET_BATCH_SIZE = 1000
+
+
 def show_stats(store: SyncStore):
     """显示当前统计"""
     stats = store.get_stats()
@@ -46,6 +52,26 @@ def show_stats(store: SyncStore):
     return stats
 
 
+def _begin_write(conn):
+    """开启写事务：WAL + synchronous=NORMAL，BEGIN IMMEDIATE 一次性拿到写锁
+
+    整个操作的多条语句在同一事务内提交，只在 COMMIT 时落盘一次。
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("BEGIN IMMEDIATE")
+
+
+def _has_table(conn, name: str) -> bool:
+    """表是否存在（v3 起 sync_failures 仅在旧库中保留）"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (name,)
+    ).fetchone()
+    return row is not None
+
+
 def get_mailbox_count(store: SyncStore, mailbox: str) -> int:
     """获取指定邮箱的邮件数量"""
     conn = store._get_connection()
@@ -60,91 +86,115 @@ def get_mailbox_count(store: SyncStore, mailbox: str) -> int:
         conn.close()
 
 
-def delete_oldest_emails(store: SyncStore, count: int, mailbox: str = None, auto_confirm: bool = False):
-    """删除最早的邮件"""
-    conn = store._get_connection()
+def _delete_oldest(conn, delete_count: int, mailbox: str = None, auto_confirm: bool = False) -> int:
+    """在已打开的连接上删除最早的 delete_count 封邮件（调用方已统计总数）
+
+    Returns:
+        实际删除数
+    """
     cursor = conn.cursor()
+    where_clause = "WHERE mailbox = ?" if mailbox else ""
+    params = [mailbox] if mailbox else []
 
     try:
-        # 构建查询条件
-        where_clause = "WHERE mailbox = ?" if mailbox else ""
-        params = [mailbox] if mailbox else []
-
-        # 获取总数
-        cursor.execute(f"SELECT COUNT(*) FROM email_metadata {where_clause}", params)
-        total = cursor.fetchone()[0]
-
-        if total == 0:
-            mailbox_str = f" ({mailbox})" if mailbox else ""
-            print(f"\n✅ 没有邮件{mailbox_str}，无需清理")
-            return
-
-        delete_count = min(count, total)
-        mailbox_str = f" ({mailbox})" if mailbox else ""
-        print(f"\n📝 将删除最早的 {delete_count} 封邮件{mailbox_str}")
-
         # 确认
         if not auto_confirm:
             confirm = input(f"\n确认删除 {delete_count} 封邮件? (y/n): ")
             if confirm.lower() != 'y':
                 print("已取消")
-                return
+                return 0
 
-        # 获取要删除的邮件
-        cursor.execute(f"""
-            SELECT message_id, subject, date_received, mailbox
-            FROM email_metadata
-            {where_clause}
-            ORDER BY date_received ASC
-            LIMIT ?
-        """, params + [delete_count])
+        _begin_write(conn)
 
-        to_delete = cursor.fetchall()
+        print(f"\n🗑️ 正在删除 {delete_count} 封邮件...")
 
-        print(f"\n🗑️ 正在删除 {len(to_delete)} 封邮件...")
+        # 一条语句删除最早的 delete_count 封，RETURNING 同时取回预览所需字段
+        # （RETURNING 的行顺序不保证，按时间重新排序）
+        cursor.execute(f"""
+            DELETE FROM email_metadata
+            WHERE rowid IN (
+                SELECT rowid FROM email_metadata
+                {where_clause}
+                ORDER BY date_received ASC
+                LIMIT ?
+            )
+            RETURNING message_id, subject, date_received, mailbox
+        """, params + [delete_count])
+        deleted_rows = sorted(cursor.fetchall(), key=lambda row: row['date_received'] or '')
 
         # 显示前5封
         print("\n   最早的 5 封:")
-        for row in to_delete[:5]:
+        for row in deleted_rows[:5]:
             date_str = (row['date_received'] or '')[:10]
             print(f"     - [{date_str}] [{row['mailbox']}] {(row['subject'] or '')[:35]}...")
 
-        if len(to_delete) > 10:
-            print(f"     ... (省略 {len(to_delete) - 10} 封)")
+        if len(deleted_rows) > 10:
+            print(f"     ... (省略 {len(deleted_rows) - 10} 封)")
 
-        if len(to_delete) > 5:
+        if len(deleted_rows) > 5:
             print("\n   最后删除的 5 封:")
-            for row in to_delete[-5:]:
+            for row in deleted_rows[-5:]:
                 date_str = (row['date_received'] or '')[:10]
                 print(f"     - [{date_str}] [{row['mailbox']}] {(row['subject'] or '')[:35]}...")
 
-        # 执行删除
-        message_ids = [row['message_id'] for row in to_delete]
-        placeholders = ','.join('?' * len(message_ids))
-
-        cursor.execute(f"""
-            DELETE FROM email_metadata
-            WHERE message_id IN ({placeholders})
-        """, message_ids)
-
-        cursor.execute(f"""
-            DELETE FROM sync_failures
-            WHERE message_id IN ({placeholders})
-        """, message_ids)
+        # 旧版 sync_failures 表存在时清理对应记录（ID 列表作为一个 JSON 参数传入）
+        message_ids = [row['message_id'] for row in deleted_rows if row['message_id']]
+        if message_ids and _has_table(conn, "sync_failures"):
+            cursor.execute("""
+                DELETE FROM sync_failures
+                WHERE message_id IN (SELECT value FROM json_each(?))
+            """, (orjson.dumps(message_ids).decode(),))
+        deleted = len(deleted_rows)
 
         conn.commit()
-        print(f"\n✅ 已删除 {len(message_ids)} 封邮件")
+        print(f"\n✅ 已删除 {deleted} 封邮件")
+        return deleted
 
     except Exception as e:
         conn.rollback()
         print(f"\n❌ 删除失败: {e}")
         raise
+
+
+def delete_oldest_emails(store: SyncStore, count: int, mailbox: str = None, auto_confirm: bool = False) -> int:
+    """删除最早的邮件
+
+    Returns:
+        实际删除数
+    """
+    conn = store._get_connection()
+    cursor = conn.cursor()
+
+    try:
+        # 构建查询条件
+        where_clause = "WHERE mailbox = ?" if mailbox else ""
+        params = [mailbox] if mailbox else []
+
+        # 获取总数
+        cursor.execute(f"SELECT COUNT(*) FROM email_metadata {where_clause}", params)
+        total = cursor.fetchone()[0]
+
+        if total == 0:
+            mailbox_str = f" ({mailbox})" if mailbox else ""
+            print(f"\n✅ 没有邮件{mailbox_str}，无需清理")
+            return 0
+
+        delete_count = min(count, total)
+        mailbox_str = f" ({mailbox})" if mailbox else ""
+        print(f"\n📝 将删除最早的 {delete_count} 封邮件{mailbox_str}")
+
+        return _delete_oldest(conn, delete_count, mailbox, auto_confirm)
+
     finally:
         conn.close()
 
 
-def keep_newest_emails(store: SyncStore, keep_count: int, mailbox: str = None, auto_confirm: bool = False):
-    """保留最新的 N 封邮件，删除其余的"""
+def keep_newest_emails(store: SyncStore, keep_count: int, mailbox: str = None, auto_confirm: bool = False) -> int:
+    """保留最新的 N 封邮件，删除其余的
+
+    Returns:
+        实际删除数
+    """
     conn = store._get_connection()
     cursor = conn.cursor()
 
@@ -160,19 +210,19 @@ def keep_newest_emails(store: SyncStore, keep_count: int, mailbox: str = None, a
         if total == 0:
             mailbox_str = f" ({mailbox})" if mailbox else ""
             print(f"\n✅ 没有邮件{mailbox_str}，无需清理")
-            return
+            return 0
 
         delete_count = max(0, total - keep_count)
         if delete_count == 0:
             mailbox_str = f" ({mailbox})" if mailbox else ""
             print(f"\n✅ 当前只有 {total} 封{mailbox_str}，小于等于要保留的 {keep_count} 封，无需删除")
-            return
+            return 0
 
         mailbox_str = f" ({mailbox})" if mailbox else ""
         print(f"\n📝 将删除最早的 {delete_count} 封邮件{mailbox_str}，保留最新的 {keep_count} 封")
 
-        # 调用删除函数
-        delete_oldest_emails(store, delete_count, mailbox, auto_confirm)
+        # 复用同一连接和总数执行删除
+        return _delete_oldest(conn, delete_count, mailbox, auto_confirm)
 
     finally:
         conn.close()
@@ -218,38 +268,38 @@ def reset_sync_status(store: SyncStore, mailbox: str = None, auto_confirm: bool
                 print("已取消")
                 return
 
-        # 执行重置
-        if mailbox:
-            cursor.execute("""
+        # 分批执行重置：每批 RESET_BATCH_SIZE 行一个事务，缩短写锁时间、WAL 不会一次性膨胀
+        _begin_write(conn)
+        while True:
+            cursor.execute(f"""
                 UPDATE email_metadata
                 SET sync_status = 'pending',
                     notion_page_id = NULL,
                     notion_thread_id = NULL,
                     sync_error = NULL,
                     retry_count = 0
-                WHERE mailbox = ? AND sync_status != 'pending'
-            """, (mailbox,))
-        else:
-            cursor.execute("""
-                UPDATE email_metadata
-                SET sync_status = 'pending',
-                    notion_page_id = NULL,
-                    notion_thread_id = NULL,
-                    sync_error = NULL,
-                    retry_count = 0
-                WHERE sync_status != 'pending'
-            """)
-
-        # 清空失败队列
-        if mailbox:
-            cursor.execute("""
-                DELETE FROM sync_failures
-                WHERE message_id IN (
-                    SELECT message_id FROM email_metadata WHERE mailbox = ?
+                WHERE rowid IN (
+                    SELECT rowid FROM email_metadata
+                    {where_clause}
+                    LIMIT ?
                 )
-            """, (mailbox,))
-        else:
-            cursor.execute("DELETE FROM sync_failures")
+            """, params + [RESET_BATCH_SIZE])
+            if cursor.rowcount == 0:
+                break
+            conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+
+        # 清空失败队列（旧版 sync_failures 表）
+        if _has_table(conn, "sync_failures"):
+            if mailbox:
+                cursor.execute("""
+                    DELETE FROM sync_failures
+                    WHERE message_id IN (
+                        SELECT message_id FROM email_metadata WHERE mailbox = ?
+                    )
+                """, (mailbox,))
+            else:
+                cursor.execute("DELETE FROM sync_failures")
 
         conn.commit()
         print(f"\n✅ 已重置 {total_reset} 封邮件的同步状态为 pending")
@@ -325,7 +375,9 @@ def main():
     # 压缩数据库
     if not args.stats:
         print("\n🔧 压缩数据库...")
-        store.vacuum()
+        # 只回收删除释放的空闲页；旧库未启用增量回收时做一次全量 VACUUM（同时完成转换）
+        if not store.incremental_vacuum():
+            store.vacuum()
         print("✅ 完成")
 
 
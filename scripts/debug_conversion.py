@@ -2,15 +2,19 @@ import sys
 import json
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.utils.logger import setup_logger
 from src.config import config
-from src.mail.reader import EmailReader
-from src.converter.html_converter import HTMLToNotionConverter
+from _debug_common import extract_text, get_first_unread
 
 def main():
     """调试邮件转换"""
+    # 转换模块依赖较重，只在实际运行时导入
+    from src.converter.html_converter import HTMLToNotionConverter
+
     setup_logger(config.log_level)
 
     print("=" * 60)
@@ -18,8 +22,7 @@ def main():
     print("=" * 60)
 
     # 读取第一封未读邮件
-    reader = EmailReader()
-    emails = reader.get_unread_emails(limit=1)
+    emails = get_first_unread()
 
     if not emails:
         print("❌ 没有未读邮件")
@@ -41,25 +44,12 @@ def main():
     for i, block in enumerate(blocks):
         block_type = block.get("type", "unknown")
 
-        # 获取文本内容
-        text_content = ""
-        if block_type == "paragraph":
-            text_content = block["paragraph"]["rich_text"][0]["text"]["content"]
-        elif block_type.startswith("heading_"):
-            text_content = block[block_type]["rich_text"][0]["text"]["content"]
-        elif block_type == "bulleted_list_item":
-            text_content = block["bulleted_list_item"]["rich_text"][0]["text"]["content"]
-        elif block_type == "numbered_list_item":
-            text_content = block["numbered_list_item"]["rich_text"][0]["text"]["content"]
-        elif block_type == "quote":
-            text_content = block["quote"]["rich_text"][0]["text"]["content"]
-        elif block_type == "code":
-            text_content = block["code"]["rich_text"][0]["text"]["content"]
+        text_content = extract_text(block)
 
         text_len = len(text_content)
         status = "✅" if text_len <= 2000 else "❌"
 
-        if text_len > 1900 or text_len > 2000:
+        if text_len > 1900:
             print(f"{status} Block {i}: {block_type} - {text_len} chars")
             if text_len > 2000:
                 print(f"   超出: {text_len - 2000} 字符")
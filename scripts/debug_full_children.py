@@ -2,16 +2,19 @@ import sys
 import json
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.utils.logger import setup_logger
 from src.config import config
-from src.mail.reader import EmailReader
-from src.notion.sync import NotionSync
-from src.models import Email
+from _debug_common import extract_text, get_first_unread
 
 def main():
     """调试完整的children blocks"""
+    # Notion 同步模块依赖较重，只在实际运行时导入
+    from src.notion.sync import NotionSync
+
     setup_logger(config.log_level)
 
     print("=" * 60)
@@ -19,8 +22,7 @@ def main():
     print("=" * 60)
 
     # 读取第一封未读邮件
-    reader = EmailReader()
-    emails = reader.get_unread_emails(limit=1)
+    emails = get_first_unread()
 
     if not emails:
         print("❌ 没有未读邮件")
@@ -34,46 +36,32 @@ def main():
     children = syncer._build_children(email, uploaded_files=None)
 
     print(f"\n生成了 {len(children)} 个 children blocks")
+
+    # 先提取所有文本并计算长度，再统一审计
+    texts = [extract_text(block) for block in children]
+    lens = list(map(len, texts))
+    over_limit = [i for i, n in enumerate(lens) if n > 2000]
+
+    # 常见情况：没有超长 block，只输出一行汇总
+    if not over_limit:
+        print(f"✅ 所有 {len(children)} 个 block 都不超过 2000 字符 (最长 {max(lens, default=0)})")
+        return
+
     print("\n检查每个block的长度:")
     print("-" * 60)
 
-    for i, block in enumerate(children):
-        block_type = block.get("type", "unknown")
-
-        # 获取文本内容
-        text_content = ""
-        try:
-            if block_type == "paragraph":
-                text_content = block["paragraph"]["rich_text"][0]["text"]["content"]
-            elif block_type.startswith("heading_"):
-                text_content = block[block_type]["rich_text"][0]["text"]["content"]
-            elif block_type == "bulleted_list_item":
-                text_content = block["bulleted_list_item"]["rich_text"][0]["text"]["content"]
-            elif block_type == "numbered_list_item":
-                text_content = block["numbered_list_item"]["rich_text"][0]["text"]["content"]
-            elif block_type == "quote":
-                text_content = block["quote"]["rich_text"][0]["text"]["content"]
-            elif block_type == "code":
-                text_content = block["code"]["rich_text"][0]["text"]["content"]
-            elif block_type == "callout":
-                text_content = block["callout"]["rich_text"][0]["text"]["content"]
-            elif block_type == "divider":
-                text_content = "(divider)"
-        except Exception as e:
-            text_content = f"(error: {e})"
-
-        text_len = len(text_content)
+    for i, (block, text_len) in enumerate(zip(children, lens)):
         status = "✅" if text_len <= 2000 else "❌"
-
-        print(f"{status} Block {i}: {block_type:20s} - {text_len:5d} chars", end="")
+        print(f"{status} Block {i}: {block.get('type', 'unknown'):20s} - {text_len:5d} chars", end="")
         if text_len > 2000:
             print(f"  ⚠️ 超出 {text_len - 2000} 字符!")
+            print(f"   前200字符: {texts[i][:200]!r}")
+            print()
         else:
             print()
 
-        if text_len > 2000:
-            print(f"   前200字符: {text_content[:200]!r}")
-            print()
+    print("-" * 60)
+    print(f"❌ {len(over_limit)} 个 block 超过 2000 字符: {over_limit}")
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,55 @@
 import sys
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.mail.applescript import AppleScriptExecutor
 
+# 每个账户检查未读数的邮箱数量（只检查前几个邮箱）
+UNREAD_CHECK_LIMIT = 5
+
+# 一次 osascript 调用取回全部账户、邮箱及前几个邮箱的未读数
+# 输出 "A{{FIELD}}账户名{{REC}}" 与 "M{{FIELD}}邮箱名{{FIELD}}未读数（空=未检查，ERR 开头=出错）{{REC}}"
+STRUCTURE_SCRIPT = f'''
+tell application "Mail"
+    set resultText to ""
+    repeat with theAccount in accounts
+        set resultText to resultText & "A{{{{FIELD}}}}" & (name of theAccount) & "{{{{REC}}}}"
+        set i to 0
+        repeat with theMailbox in mailboxes of theAccount
+            set i to i + 1
+            set unreadStr to ""
+            if i <= {UNREAD_CHECK_LIMIT} then
+                try
+                    set unreadStr to (count of (messages of theMailbox whose read status is false)) as string
+                on error errMsg
+                    set unreadStr to "ERR " & errMsg
+                end try
+            end if
+            set resultText to resultText & "M{{{{FIELD}}}}" & (name of theMailbox) & "{{{{FIELD}}}}" & unreadStr & "{{{{REC}}}}"
+        end repeat
+    end repeat
+    return resultText
+end tell
+'''
+
+
+def parse_structure(output: str) -> dict:
+    """解析脚本输出为 {账户名: [(邮箱名, 未读数字符串), ...]}（保持顺序）"""
+    structure = {}
+    mailboxes = None
+    for rec in output.split("{{REC}}"):
+        kind, _, payload = rec.strip().partition("{{FIELD}}")
+        if kind == "A":
+            mailboxes = structure.setdefault(payload, [])
+        elif kind == "M" and mailboxes is not None:
+            name, _, unread = payload.partition("{{FIELD}}")
+            mailboxes.append((name, unread))
+    return structure
+
+
 def main():
     """调试 Mail.app 结构"""
     print("=" * 60)
@@ -12,70 +57,31 @@ def main():
     print("=" * 60)
     print()
 
-    # 1. 获取所有账户名称
+    # 1. 获取所有账户、邮箱及未读数（单次 AppleScript 调用）
     print("1️⃣  获取所有账户...")
-    script = '''
-    tell application "Mail"
-        set accountNames to {}
-        repeat with theAccount in accounts
-            set end of accountNames to name of theAccount
-        end repeat
-        return accountNames
-    end tell
-    '''
     try:
-        result = AppleScriptExecutor.execute(script)
-        accounts = [name.strip() for name in result.split(",") if name.strip()]
-        print(f"   找到 {len(accounts)} 个账户:")
-        for i, account in enumerate(accounts, 1):
+        structure = parse_structure(AppleScriptExecutor.execute(STRUCTURE_SCRIPT))
+        print(f"   找到 {len(structure)} 个账户:")
+        for i, account in enumerate(structure, 1):
             print(f"   {i}. {account}")
         print()
 
-        # 2. 对每个账户，获取其邮箱列表
-        for account_name in accounts:
+        # 2. 每个账户的邮箱列表
+        for account_name, mailboxes in structure.items():
             print(f"2️⃣  账户 '{account_name}' 的邮箱列表:")
-            script = f'''
-            tell application "Mail"
-                tell account "{account_name}"
-                    set mailboxNames to {{}}
-                    repeat with theMailbox in mailboxes
-                        set end of mailboxNames to name of theMailbox
-                    end repeat
-                    return mailboxNames
-                end tell
-            end tell
-            '''
-            try:
-                result = AppleScriptExecutor.execute(script)
-                mailboxes = [name.strip() for name in result.split(",") if name.strip()]
-                print(f"   找到 {len(mailboxes)} 个邮箱:")
-                for i, mailbox in enumerate(mailboxes, 1):
-                    print(f"   {i}. {mailbox}")
-                print()
-
-                # 3. 尝试获取未读邮件数量
-                print(f"3️⃣  尝试获取各邮箱的未读邮件数...")
-                for mailbox_name in mailboxes[:5]:  # 只检查前5个邮箱
-                    try:
-                        script = f'''
-                        tell application "Mail"
-                            tell account "{account_name}"
-                                tell mailbox "{mailbox_name}"
-                                    return count of (messages whose read status is false)
-                                end tell
-                            end tell
-                        end tell
-                        '''
-                        count = AppleScriptExecutor.execute(script)
-                        if count.isdigit() and int(count) > 0:
-                            print(f"   ✅ '{mailbox_name}': {count} 封未读邮件")
-                    except Exception as e:
-                        print(f"   ❌ '{mailbox_name}': 无法访问 ({str(e)[:50]}...)")
-                print()
+            print(f"   找到 {len(mailboxes)} 个邮箱:")
+            for i, (mailbox, _) in enumerate(mailboxes, 1):
+                print(f"   {i}. {mailbox}")
+            print()
 
-            except Exception as e:
-                print(f"   ❌ 无法获取邮箱列表: {e}")
-                print()
+            # 3. 未读邮件数量
+            print(f"3️⃣  尝试获取各邮箱的未读邮件数...")
+            for mailbox_name, unread in mailboxes[:UNREAD_CHECK_LIMIT]:
+                if unread.startswith("ERR"):
+                    print(f"   ❌ '{mailbox_name}': 无法访问 ({unread[4:54]}...)")
+                elif unread.isdigit() and int(unread) > 0:
+                    print(f"   ✅ '{mailbox_name}': {unread} 封未读邮件")
+            print()
 
     except Exception as e:
         print(f"❌ 无法获取账户列表: {e}")
@@ -1,17 +1,21 @@
 import sys
 import asyncio
-import json
+import orjson
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.utils.logger import setup_logger
 from src.config import config
-from src.mail.reader import EmailReader
-from src.notion.sync import NotionSync
+from _debug_common import extract_text, get_first_unread
 
 async def main():
     """调试发送给Notion的payload"""
+    # Notion 同步模块依赖较重，只在实际运行时导入
+    from src.notion.sync import NotionSync
+
     setup_logger("DEBUG")
 
     print("=" * 60)
@@ -19,8 +23,7 @@ async def main():
     print("=" * 60)
 
     # 读取第一封未读邮件
-    reader = EmailReader()
-    emails = reader.get_unread_emails(limit=1)
+    emails = get_first_unread()
 
     if not emails:
         print("❌ 没有未读邮件")
@@ -50,39 +53,24 @@ async def main():
     print("\n检查children中的长文本:")
     print("-" * 60)
 
-    # 将children转为JSON看看实际发送的内容
-    json_str = json.dumps(children, ensure_ascii=False)
-
     for i, block in enumerate(children):
         block_type = block.get("type", "unknown")
 
-        # 序列化单个block为JSON
-        block_json = json.dumps(block, ensure_ascii=False)
+        # 序列化单个block为JSON（UTF-8 字节，即实际发送的内容）
+        block_json = orjson.dumps(block)
         block_json_len = len(block_json)
 
-        # 提取文本
-        text = ""
-        try:
-            if block_type == "paragraph":
-                text = block["paragraph"]["rich_text"][0]["text"]["content"]
-            elif block_type.startswith("heading_"):
-                text = block[block_type]["rich_text"][0]["text"]["content"]
-            elif block_type == "callout":
-                text = block["callout"]["rich_text"][0]["text"]["content"]
-        except:
-            pass
-
-        text_len = len(text)
+        text_len = len(extract_text(block))
 
         if text_len > 1900 or block_json_len > 3000:
             status = "❌" if text_len > 2000 else "⚠️"
             print(f"{status} Block {i}: {block_type}")
             print(f"   文本长度: {text_len} chars")
-            print(f"   JSON长度: {block_json_len} chars")
+            print(f"   JSON长度: {block_json_len} bytes")
             if text_len > 2000:
                 print(f"   超出: {text_len - 2000} 字符")
             # 检查是否有特殊字符
-            if '\\' in block_json:
+            if b'\\' in block_json:
                 print(f"   ⚠️ JSON中包含转义字符")
 
 if __name__ == "__main__":
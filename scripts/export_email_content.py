@@ -2,12 +2,17 @@ import sys
 import asyncio
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.utils.logger import setup_logger
 from src.config import config
 from src.mail.reader import EmailReader
 
+# 删除 \r（CRLF → LF），str.translate 单次遍历完成
+_CRLF_TABLE = str.maketrans('', '', '\r')
+
 async def main():
     """导出邮件正文到文件"""
     # 初始化日志
@@ -34,13 +39,20 @@ async def main():
     # 导出到文件
     output_file = Path(__file__).parent.parent / "email_content_sample.txt"
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(f"Subject: {email.subject}\n")
-        f.write(f"From: {email.sender_name} <{email.sender}>\n")
-        f.write(f"Content-Type: {email.content_type}\n")
-        f.write(f"Content-Length: {len(email.content)} chars\n")
-        f.write("=" * 80 + "\n\n")
-        f.write(email.content)
+    header = (
+        f"Subject: {email.subject}\n"
+        f"From: {email.sender_name} <{email.sender}>\n"
+        f"Content-Type: {email.content_type}\n"
+        f"Content-Length: {len(email.content)} chars\n"
+        + "=" * 80 + "\n\n"
+    )
+
+    body = email.content.translate(_CRLF_TABLE)
+
+    # 二进制模式写入预先编码的 UTF-8 字节（不经过 TextIOWrapper 的编码层）
+    with open(output_file, 'wb', buffering=1 << 20) as f:
+        f.write(header.encode('utf-8'))
+        f.write(body.encode('utf-8'))
 
     print(f"\n✅ 内容已导出到: {output_file}")
     print(f"文件大小: {output_file.stat().st_size} 字节")
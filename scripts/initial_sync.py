@@ -51,31 +51,43 @@ Usage:
 
 import asyncio
 import argparse
-import json
+import re
 import sys
 import time
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
+from functools import cached_property, lru_cache
 from typing import List, Dict, Optional
 
 # 添加项目根目录到 Python 路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
 # 北京时区
 BEIJING_TZ = timezone(timedelta(hours=8))
 
+# 初始化获取邮件时单次 AppleScript 调用的区间大小
+RANGE_FETCH_SIZE = 1000
+
+# 中文日期格式，如 "2025年9月9日 星期二 下午8:48:14"
+_CHINESE_DT_RE = re.compile(
+    r'(\d{4})年(\d{1,2})月(\d{1,2})日\s+星期[一二三四五六日]\s+(上午|下午)(\d{1,2}):(\d{2}):(\d{2})'
+)
+
+# "Name" <email@example.com> 中的邮箱地址
+_ANGLE_ADDR_RE = re.compile(r'<([^>]+)>')
+
+import orjson
 from loguru import logger
 from src.config import config as settings
 from src.models import Email
-from src.mail.applescript_arm import AppleScriptArm
 from src.mail.sync_store import SyncStore
-from src.mail.reader import EmailReader
-from src.notion.sync import NotionSync
 
 
+@lru_cache(maxsize=1)
 def get_system_timezone() -> timezone:
-    """获取系统当前时区（考虑夏令时）"""
+    """获取系统当前时区（考虑夏令时，进程内只计算一次）"""
     local_time = time.localtime()
     if local_time.tm_isdst > 0:
         offset_seconds = -time.altzone
@@ -84,6 +96,16 @@ def get_system_timezone() -> timezone:
     return timezone(timedelta(seconds=offset_seconds))
 
 
+@lru_cache(maxsize=1)
+def get_system_tz_suffix() -> str:
+    """系统时区的 ISO 8601 偏移后缀，如 "+08:00"（用于给无时区的本地时间补时区）"""
+    total_seconds = int(get_system_timezone().utcoffset(None).total_seconds())
+    hours, remainder = divmod(abs(total_seconds), 3600)
+    minutes = remainder // 60
+    sign = '+' if total_seconds >= 0 else '-'
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
 def parse_chinese_datetime(date_str: str) -> Optional[datetime]:
     """解析中文日期格式
 
@@ -94,11 +116,7 @@ def parse_chinese_datetime(date_str: str) -> Optional[datetime]:
     Returns:
         datetime 对象（无时区），解析失败返回 None
     """
-    import re
-
-    # 匹配中文日期格式
-    pattern = r'(\d{4})年(\d{1,2})月(\d{1,2})日\s+星期[一二三四五六日]\s+(上午|下午)(\d{1,2}):(\d{2}):(\d{2})'
-    match = re.match(pattern, date_str)
+    match = _CHINESE_DT_RE.match(date_str)
     if not match:
         return None
 
@@ -170,6 +188,10 @@ def dates_match(store_date_str: str, notion_date_str: str, tolerance_seconds: in
     Returns:
         是否匹配
     """
+    # 字符串完全相同时无需解析
+    if store_date_str == notion_date_str:
+        return True
+
     store_dt = parse_datetime_with_tz(store_date_str)
     notion_dt = parse_datetime_with_tz(notion_date_str)
 
@@ -179,11 +201,8 @@ def dates_match(store_date_str: str, notion_date_str: str, tolerance_seconds: in
         notion_date = (notion_date_str or '')[:10]
         return store_date == notion_date
 
-    # 转换为 UTC 比较
-    store_utc = store_dt.astimezone(timezone.utc)
-    notion_utc = notion_dt.astimezone(timezone.utc)
-
-    diff_seconds = abs((store_utc - notion_utc).total_seconds())
+    # 两者均带时区，直接相减即按 UTC 计算差值（无需先 astimezone）
+    diff_seconds = abs((store_dt - notion_dt).total_seconds())
     return diff_seconds <= tolerance_seconds
 
 
@@ -251,15 +270,15 @@ class AnalysisReport:
 
     def save(self, path: str):
         """保存到 JSON 文件"""
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
         print(f"  ✅ 报告已保存到: {path}")
 
     @classmethod
     def load(cls, path: str) -> 'AnalysisReport':
         """从 JSON 文件加载"""
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(path, 'rb') as f:
+            data = orjson.loads(f.read())
         report = cls.from_dict(data)
         print(f"  ✅ 已加载报告: {path} (创建于 {report.created_at})")
         return report
@@ -280,18 +299,34 @@ class InitialSync:
         self.mailboxes = getattr(settings, 'init_mailboxes', ["收件箱", "发件箱"])
         self.mailbox_limits = mailbox_limits or {}
 
-        # 初始化组件
-        self.arm = AppleScriptArm(
-            account_name=settings.mail_account_name,
-            inbox_name=settings.mail_inbox_name
-        )
+        # 初始化组件（AppleScript / Notion / EmailReader 在首次使用时才导入并创建，
+        # 只执行部分 action 时不加载用不到的模块）
         self.sync_store = SyncStore(sync_store_path)
-        self.notion_sync = NotionSync()
-        self.email_reader = EmailReader()
 
         # 分析报告
         self.report = AnalysisReport()
 
+    @cached_property
+    def arm(self):
+        """AppleScript 机械臂"""
+        from src.mail.applescript_arm import AppleScriptArm
+        return AppleScriptArm(
+            account_name=settings.mail_account_name,
+            inbox_name=settings.mail_inbox_name
+        )
+
+    @cached_property
+    def notion_sync(self):
+        """Notion 同步器"""
+        from src.notion.sync import NotionSync
+        return NotionSync()
+
+    @cached_property
+    def email_reader(self):
+        """邮件读取器（构建完整 Email 对象用）"""
+        from src.mail.reader import EmailReader
+        return EmailReader()
+
     @property
     def comparison(self) -> Dict:
         """兼容旧代码的属性"""
@@ -469,8 +504,9 @@ class InitialSync:
                 need_count = 0  # 0 = 不限制，获取全部
                 print(f"\n  获取 {mailbox}（已有 {existing} 封，无数量限制）...")
 
-            # 分批获取邮件（从配置读取批量大小）
-            batch_size = settings.init_batch_size
+            # 先按大区间获取（每个区间只启动一次 osascript），
+            # 区间获取失败（如超时）后回退为按配置的批量大小分批获取
+            batch_size = max(RANGE_FETCH_SIZE, settings.init_batch_size)
             # 从已有数量位置开始，避免重复获取
             offset = existing
             mailbox_total = 0
@@ -493,11 +529,18 @@ class InitialSync:
                 print(f"    📥 获取第 {offset + 1} - {offset + fetch_count} 封...", end=' ', flush=True)
 
                 # 使用 offset 分页获取
-                import time
                 start_time = time.time()
-                emails = self.arm._fetch_emails_from_applescript(fetch_count, self.arm._get_mailbox_name(mailbox), offset=offset)
+                emails = self.arm.fetch_emails_range(mailbox, offset, fetch_count)
                 elapsed = time.time() - start_time
 
+                if emails is None:
+                    if batch_size > settings.init_batch_size:
+                        batch_size = settings.init_batch_size
+                        print(f"区间获取失败，改为每批 {batch_size} 封 ({elapsed:.1f}s)")
+                        continue
+                    print(f"获取失败 ({elapsed:.1f}s)")
+                    break
+
                 if not emails:
                     print(f"无更多邮件 ({elapsed:.1f}s)")
                     break
@@ -514,14 +557,7 @@ class InitialSync:
                     date_received = email.get('date_received', '')
                     if date_received and '+' not in date_received and not date_received.endswith('Z'):
                         # 添加系统时区
-                        sys_tz = get_system_timezone()
-                        tz_offset = sys_tz.utcoffset(None)
-                        total_seconds = int(tz_offset.total_seconds())
-                        hours, remainder = divmod(abs(total_seconds), 3600)
-                        minutes = remainder // 60
-                        sign = '+' if total_seconds >= 0 else '-'
-                        tz_suffix = f"{sign}{hours:02d}:{minutes:02d}"
-                        date_received = date_received + tz_suffix
+                        date_received += get_system_tz_suffix()
 
                     email_dict = {
                         'internal_id': email.get('id'),  # v3: AppleScript id
@@ -559,6 +595,10 @@ class InitialSync:
         self.stats["fetched_from_applescript"] = total_fetched
         self.stats["saved_to_store"] = total_fetched
 
+        # 批量写入后更新统计信息（按邮箱计数、按 message_id / thread_id 查找都依赖索引）
+        if total_fetched > 0:
+            self.sync_store.analyze()
+
         # 如果没有新获取的，检查是否已有数据
         if total_fetched == 0:
             total_existing = sum(existing_counts.values())
@@ -572,10 +612,11 @@ class InitialSync:
         """获取 SyncStore 中所有邮件
 
         Returns:
-            {message_id: {subject, sender, date_received, thread_id, mailbox, sync_status}}
+            {去掉 <> 的 message_id: {message_id, subject, sender, date_received, thread_id, mailbox, sync_status}}
         """
         store_emails = {}
         conn = self.sync_store._get_connection()
+        conn.row_factory = None  # 返回普通元组，按位置解包，不经过 sqlite3.Row 的按名查找
         cursor = conn.cursor()
 
         try:
@@ -583,22 +624,31 @@ class InitialSync:
                 SELECT internal_id, message_id, subject, sender, date_received, thread_id,
                        mailbox, sync_status, notion_page_id
                 FROM email_metadata
+                WHERE message_id IS NOT NULL
             """)
 
-            for row in cursor.fetchall():
-                store_emails[row['message_id']] = {
-                    "internal_id": row['internal_id'],
-                    "subject": row['subject'],
-                    "sender": row['sender'],
-                    "date_received": row['date_received'],
-                    "thread_id": row['thread_id'],
-                    "mailbox": row['mailbox'],
-                    "sync_status": row['sync_status'],
-                    "notion_page_id": row['notion_page_id']
+            # 逐行迭代游标，不先 fetchall() 出完整的行列表
+            for (internal_id, message_id, subject, sender, date_received, thread_id,
+                 mailbox, sync_status, notion_page_id) in cursor:
+                # 尚未获取 message_id 的行（NewWatcher 先写入 internal_id）无法与 Notion 对比
+                if not message_id:
+                    continue
+                store_emails[message_id.strip('<>')] = {
+                    "message_id": message_id,  # 原始值，用于回写 SyncStore
+                    "internal_id": internal_id,
+                    "subject": subject,
+                    "sender": sender,
+                    "date_received": date_received,
+                    "thread_id": thread_id,
+                    "mailbox": mailbox,
+                    "sync_status": sync_status,
+                    "notion_page_id": notion_page_id
                 }
 
         except Exception as e:
+            # 不返回不完整的结果：缺失的行会被误判为 notion_only
             logger.error(f"Failed to get store emails: {e}")
+            raise
         finally:
             conn.close()
 
@@ -660,14 +710,7 @@ class InitialSync:
         # 处理时区
         date_received = full_email.get('date_received', '') or full_email.get('date', '')
         if date_received and '+' not in date_received and not date_received.endswith('Z'):
-            sys_tz = get_system_timezone()
-            tz_offset = sys_tz.utcoffset(None)
-            total_seconds = int(tz_offset.total_seconds())
-            hours, remainder = divmod(abs(total_seconds), 3600)
-            minutes = remainder // 60
-            sign = '+' if total_seconds >= 0 else '-'
-            tz_suffix = f"{sign}{hours:02d}:{minutes:02d}"
-            date_received = date_received + tz_suffix
+            date_received += get_system_tz_suffix()
 
         email_dict = {
             'message_id': thread_id,
@@ -693,49 +736,49 @@ class InitialSync:
         - self.report.comparison: SyncStore vs Notion 对比
         - self.report.parent_analysis: Parent Item 状态分析
         """
+        # Notion SDK / httpx 只在需要查询 Notion 时导入
+        from src.notion.page_view import get_property_ids, iter_database_pages
+
         print("  查询 Notion 数据库...")
 
         # 1. 查询 Notion（一次）
         notion_pages = []
-        has_more = True
-        start_cursor = None
-        query_count = 0
-
-        while has_more:
-            query_params = {
-                "database_id": self.notion_sync.client.email_db_id,
-                "filter": {"property": "Message ID", "rich_text": {"is_not_empty": True}},
-                "page_size": 100
-            }
-            if start_cursor:
-                query_params["start_cursor"] = start_cursor
-
-            results = await self.notion_sync.client.client.databases.query(**query_params)
-            query_count += 1
+        client = self.notion_sync.client.client
+        database_id = self.notion_sync.client.email_db_id
 
-            for page in results.get("results", []):
-                props = page.get("properties", {})
+        # 只返回分析用到的属性，减小响应体积
+        filter_properties = await get_property_ids(
+            client, database_id,
+            ["Message ID", "Subject", "From", "Date", "Thread ID", "Parent Item"]
+        )
 
-                # 提取所有需要的字段
-                message_id = self._extract_rich_text(props, "Message ID")
-                if not message_id:
-                    continue
+        # 游标只能顺序获取：解析当前一页时已预取下一页（429 / 5xx 退避重试）
+        async for page in iter_database_pages(
+            client,
+            database_id=database_id,
+            filter={"property": "Message ID", "rich_text": {"is_not_empty": True}},
+            filter_properties=filter_properties,
+            page_size=100
+        ):
+            props = page.get("properties", {})
+
+            # 提取所有需要的字段
+            message_id = self._extract_rich_text(props, "Message ID")
+            if not message_id:
+                continue
 
-                notion_pages.append({
-                    "page_id": page["id"],
-                    "message_id": message_id,
-                    "subject": self._extract_title(props, "Subject"),
-                    "sender": props.get("From", {}).get("email", ""),
-                    "date": self._extract_date(props, "Date"),
-                    "thread_id": self._extract_rich_text(props, "Thread ID"),
-                    "parent_item_id": self._extract_relation_id(props, "Parent Item"),
-                    "has_parent": len(props.get("Parent Item", {}).get("relation", [])) > 0
-                })
-
-            has_more = results.get("has_more", False)
-            start_cursor = results.get("next_cursor")
-
-            if query_count % 10 == 0:
+            notion_pages.append({
+                "page_id": page["id"],
+                "message_id": message_id,
+                "subject": self._extract_title(props, "Subject"),
+                "sender": props.get("From", {}).get("email", ""),
+                "date": self._extract_date(props, "Date"),
+                "thread_id": self._extract_rich_text(props, "Thread ID"),
+                "parent_item_id": self._extract_relation_id(props, "Parent Item"),
+                "has_parent": len(props.get("Parent Item", {}).get("relation", [])) > 0
+            })
+
+            if len(notion_pages) % 1000 == 0:
                 print(f"    已查询 {len(notion_pages)} 封...", end='\r')
 
         print(f"  Notion 中有 {len(notion_pages)} 封邮件")
@@ -744,25 +787,21 @@ class InitialSync:
         store_emails = self._get_all_store_emails()
         print(f"  SyncStore 中有 {len(store_emails)} 封邮件")
 
-        # 3. 构建索引
-        notion_by_msg_id = {}
-        for page in notion_pages:
-            msg_id = page['message_id']
-            notion_by_msg_id[msg_id] = page
-            notion_by_msg_id[msg_id.strip('<>')] = page
-
-        store_ids = set(store_emails.keys())
-        notion_ids = set(notion_by_msg_id.keys())
+        # 3. 构建索引（两侧 key 均为去掉 <> 的 message_id，每页只插入一次）
+        notion_by_msg_id = {page['message_id'].strip('<>'): page for page in notion_pages}
 
         # 4. SyncStore vs Notion 对比 → comparison
-        self._build_comparison(store_emails, notion_by_msg_id, store_ids, notion_ids)
+        self._build_comparison(store_emails, notion_by_msg_id)
 
         # 5. Parent Item 分析 → parent_analysis
         await self._build_parent_analysis(notion_pages, notion_by_msg_id, store_emails)
 
-    def _build_comparison(self, store_emails: Dict, notion_by_msg_id: Dict,
-                          store_ids: set, notion_ids: set):
-        """构建 SyncStore vs Notion 对比结果"""
+    def _build_comparison(self, store_emails: Dict, notion_by_msg_id: Dict):
+        """构建 SyncStore vs Notion 对比结果
+
+        遍历一次 SyncStore 完成"仅在 SyncStore"与"两边都有"的分类，
+        再遍历一次 Notion 找出"仅在 Notion"，不构建中间集合。
+        """
         comparison = self.report.comparison
 
         # 重置
@@ -775,33 +814,27 @@ class InitialSync:
 
         sync_start_date = settings.sync_start_date
 
-        # 仅在 SyncStore
-        for msg_id in (store_ids - notion_ids):
-            store_data = store_emails.get(msg_id)
-            if not store_data:
-                continue
-            date_received = (store_data.get('date_received') or '')[:10]
+        # 结果中使用原始 message_id（SyncStore 的主键形式）
 
-            if sync_start_date and date_received and date_received < sync_start_date:
-                comparison['store_only_before_date'].append(msg_id)
-            else:
-                comparison['store_only'].append(msg_id)
-
-        # 仅在 Notion（去重处理）
-        seen_notion_only = set()
-        for msg_id in (notion_ids - store_ids):
-            notion_data = notion_by_msg_id.get(msg_id)
-            if notion_data and notion_data['message_id'] not in seen_notion_only:
-                seen_notion_only.add(notion_data['message_id'])
-                comparison['notion_only'].append((msg_id, notion_data))
-
-        # 两边都有
-        for msg_id in (store_ids & notion_ids):
-            store_data = store_emails.get(msg_id)
-            notion_data = notion_by_msg_id.get(msg_id)
-            if not store_data or not notion_data:
+        # 仅在 Notion
+        for key, notion_data in notion_by_msg_id.items():
+            if key not in store_emails:
+                comparison['notion_only'].append((notion_data['message_id'], notion_data))
+
+        for key, store_data in store_emails.items():
+            msg_id = store_data['message_id']
+            notion_data = notion_by_msg_id.get(key)
+
+            # 仅在 SyncStore
+            if notion_data is None:
+                date_received = (store_data.get('date_received') or '')[:10]
+                if sync_start_date and date_received and date_received < sync_start_date:
+                    comparison['store_only_before_date'].append(msg_id)
+                else:
+                    comparison['store_only'].append(msg_id)
                 continue
 
+            # 两边都有
             critical_reasons = []
             date_mismatch = False
             thread_mismatch = False
@@ -812,10 +845,10 @@ class InitialSync:
             if store_subject.lower() != notion_subject.lower():
                 critical_reasons.append("subject 不同")
 
-            # 对比 sender
+            # 对比 sender（_extract_email_address 已返回小写地址）
             store_sender = self._extract_email_address(store_data.get('sender', ''))
             notion_sender = self._extract_email_address(notion_data.get('sender', ''))
-            if store_sender and notion_sender and store_sender.lower() != notion_sender.lower():
+            if store_sender and notion_sender and store_sender != notion_sender:
                 critical_reasons.append(f"sender 不同")
 
             # 对比 date
@@ -985,12 +1018,11 @@ class InitialSync:
         - Name <email@example.com>
         - email@example.com
         """
-        import re
         if not sender:
             return ""
 
         # 尝试从 <email> 格式中提取
-        match = re.search(r'<([^>]+)>', sender)
+        match = _ANGLE_ADDR_RE.search(sender)
         if match:
             return match.group(1).strip().lower()
 
@@ -1294,14 +1326,7 @@ class InitialSync:
                 # 添加系统时区到 AppleScript 返回的本地时间
                 date_received = full_email.get('date_received', '') or full_email.get('date', '')
                 if date_received and '+' not in date_received and not date_received.endswith('Z'):
-                    sys_tz = get_system_timezone()
-                    tz_offset = sys_tz.utcoffset(None)
-                    total_seconds = int(tz_offset.total_seconds())
-                    hours, remainder = divmod(abs(total_seconds), 3600)
-                    minutes = remainder // 60
-                    sign = '+' if total_seconds >= 0 else '-'
-                    tz_suffix = f"{sign}{hours:02d}:{minutes:02d}"
-                    date_received = date_received + tz_suffix
+                    date_received += get_system_tz_suffix()
 
                 email_dict = {
                     'message_id': message_id,
@@ -1826,8 +1851,9 @@ async def main():
         # 默认：运行完整流程
         await sync.run(auto_confirm=args.yes, limit=args.limit)
 
-    # 关闭 aiohttp session，避免 "Unclosed client session" 警告
-    await sync.notion_sync.client.close()
+    # 关闭 aiohttp session，避免 "Unclosed client session" 警告（未创建 NotionSync 时跳过）
+    if 'notion_sync' in sync.__dict__:
+        await sync.notion_sync.client.close()
 
 
 if __name__ == "__main__":
@@ -29,7 +29,9 @@ from pathlib import Path
 
 # 添加项目根目录到路径
 import sys
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 
 def get_connection(db_path: str) -> sqlite3.Connection:
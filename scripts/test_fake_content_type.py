@@ -13,7 +13,9 @@ import sys
 from pathlib import Path
 
 # 添加项目根目录到 path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.config import config
 from loguru import logger
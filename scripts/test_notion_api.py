@@ -4,7 +4,9 @@ from pathlib import Path
 from datetime import datetime, timezone, timedelta
 import uuid
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.notion.client import NotionClient
 from src.config import config
@@ -3,7 +3,9 @@ import sys
 from pathlib import Path
 import json
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = str(Path(__file__).resolve().parent.parent)
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from src.converter.html_converter import HTMLToNotionConverter
 
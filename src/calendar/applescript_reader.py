@@ -10,6 +10,7 @@ from loguru import logger
 
 from src.config import config
 from src.models import CalendarEvent, Attendee, EventStatus
+from src.mail.applescript import OSASCRIPT, OSASCRIPT_ENV
 
 
 # 分隔符定义
@@ -30,16 +31,17 @@ class CalendarAppleScriptReader:
         """执行 AppleScript 并返回结果"""
         try:
             result = subprocess.run(
-                ["osascript", "-e", script],
+                [OSASCRIPT, "-e", script],
                 capture_output=True,
-                text=True,
-                timeout=timeout
+                timeout=timeout,
+                check=False,
+                env=OSASCRIPT_ENV
             )
             if result.returncode != 0:
-                error_msg = result.stderr.strip()
+                error_msg = result.stderr.decode("utf-8", errors="replace").strip()
                 logger.error(f"AppleScript 执行失败: {error_msg}")
                 return None
-            return result.stdout.strip()
+            return result.stdout.decode("utf-8", errors="replace").strip()
         except subprocess.TimeoutExpired:
             logger.error(f"AppleScript 执行超时 ({timeout}s)")
             return None
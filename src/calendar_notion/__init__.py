@@ -1,3 +1,3 @@
-from .sync import CalendarNotionSync
+from .sync import CalendarNotionSync, event_fingerprint
 
-__all__ = ["CalendarNotionSync"]
+__all__ = ["CalendarNotionSync", "event_fingerprint"]
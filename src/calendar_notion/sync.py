@@ -2,24 +2,56 @@
 日历同步模块 - 将日历事件同步到 Notion
 """
 
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional, List, Tuple
 from loguru import logger
-from notion_client import AsyncClient
 
 from src.config import config
+from src.notion.rate_limit import create_rate_limited_client
 from src.models import CalendarEvent, EventStatus
 from src.calendar_notion.description_parser import DescriptionParser
 
 
+def event_fingerprint(event: CalendarEvent) -> int:
+    """计算事件指纹（覆盖所有写入 Notion 的字段），用于跳过未变化的事件"""
+    return hash((
+        event.title,
+        event.start_time,
+        event.end_time,
+        event.is_all_day,
+        event.location,
+        getattr(event, '_raw_description', event.description),
+        event.url,
+        event.status,
+        event.organizer,
+        event.organizer_email,
+        event.attendees_str,
+        event.is_recurring,
+        event.recurrence_rule,
+        event.last_modified,
+    ))
+
+
 class CalendarNotionSync:
     """日历事件同步到 Notion"""
 
+    # 指纹缓存有效期（秒），过期后重新查询 Notion 校验
+    FINGERPRINT_TTL = 3600
+
     def __init__(self):
-        self.client = AsyncClient(auth=config.notion_token)
+        # 与邮件同步共享传输层限速（同一 integration 的 3 次/秒额度）
+        self.client = create_rate_limited_client()
         self.database_id = config.calendar_database_id
         self.description_parser = DescriptionParser()
 
+        # event_id -> (指纹, 记录时间)，记录最近一次成功同步时的事件指纹
+        self._fingerprint_cache: Dict[str, Tuple[int, float]] = {}
+
+    async def aclose(self):
+        """关闭 Notion 客户端连接池"""
+        await self.client.aclose()
+
     async def sync_event(self, event: CalendarEvent) -> Tuple[str, str]:
         """
         同步单个事件到 Notion
@@ -54,24 +86,43 @@ class CalendarNotionSync:
             logger.error(f"同步事件失败 [{event.title}]: {e}")
             raise
 
-    async def sync_events(self, events: List[CalendarEvent]) -> Dict[str, int]:
+    async def sync_events(
+        self,
+        events: List[CalendarEvent],
+        fingerprints: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
         """
         批量同步事件
 
         Args:
             events: 事件列表
+            fingerprints: 事件指纹 {event_id: fingerprint}（见 event_fingerprint），
+                与上次成功同步时一致且未过期的事件直接跳过，不查询 Notion
 
         Returns:
             统计信息 {'created': n, 'updated': n, 'skipped': n, 'failed': n}
         """
         stats = {"created": 0, "updated": 0, "skipped": 0, "failed": 0}
+        now = time.monotonic()
 
         for event in events:
+            fingerprint = fingerprints.get(event.event_id) if fingerprints else None
+            if fingerprint is not None:
+                cached = self._fingerprint_cache.get(event.event_id)
+                if cached and cached[0] == fingerprint and now - cached[1] < self.FINGERPRINT_TTL:
+                    stats["skipped"] += 1
+                    continue
+
             try:
                 action, _ = await self.sync_event(event)
                 stats[action] += 1
             except Exception:
                 stats["failed"] += 1
+                self._fingerprint_cache.pop(event.event_id, None)
+                continue
+
+            if fingerprint is not None:
+                self._fingerprint_cache[event.event_id] = (fingerprint, now)
 
         return stats
 
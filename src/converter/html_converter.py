@@ -1,8 +1,22 @@
+import re
 from typing import List, Dict, Any
 from bs4 import BeautifulSoup
 import html2text
 from loguru import logger
 
+# 预处理：一次扫描移除 MSO/IE 条件注释块 (<!--[if ...]> ... <![endif]-->)、
+# 不成对的条件注释开始/结束标记，以及普通 HTML 注释（按分支顺序优先匹配）
+_COMMENT_RE = re.compile(
+    r'<!--\[if[^\]]*\]>.*?<!\[endif\]-->'
+    r'|<!--\[if[^\]]*\]>'
+    r'|<!\[endif\]-->'
+    r'|<!--.*?-->',
+    re.DOTALL | re.IGNORECASE
+)
+
+# 判断内容是否为 HTML 的标签特征（不区分大小写，避免为整段内容生成小写副本）
+_HTML_TAG_RE = re.compile(r'<(?:html|body|div|p>|p |br|table|a |span|b>|strong)', re.IGNORECASE)
+
 class HTMLToNotionConverter:
     """HTML 转 Notion Blocks 转换器"""
 
@@ -31,15 +45,8 @@ class HTMLToNotionConverter:
             if not self._is_html(html_content):
                 return self._text_to_blocks(html_content)
 
-            # 预处理：移除 MSO/IE 条件注释 (<!--[if ...]> ... <![endif]-->)
-            import re
-            # 移除条件注释块
-            html_content = re.sub(r'<!--\[if[^\]]*\]>.*?<!\[endif\]-->', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-            # 移除条件注释开始/结束标记（有时不匹配）
-            html_content = re.sub(r'<!--\[if[^\]]*\]>', '', html_content, flags=re.IGNORECASE)
-            html_content = re.sub(r'<!\[endif\]-->', '', html_content, flags=re.IGNORECASE)
-            # 移除普通 HTML 注释
-            html_content = re.sub(r'<!--.*?-->', '', html_content, flags=re.DOTALL)
+            # 预处理：移除 MSO/IE 条件注释和普通 HTML 注释
+            html_content = _COMMENT_RE.sub('', html_content)
 
             # 解析 HTML
             soup = BeautifulSoup(html_content, "lxml")
@@ -754,9 +761,7 @@ class HTMLToNotionConverter:
     @staticmethod
     def _is_html(content: str) -> bool:
         """判断是否是 HTML"""
-        lower = content.lower()
-        html_tags = ["<html", "<body", "<div", "<p>", "<p ", "<br", "<table", "<a ", "<span", "<b>", "<strong"]
-        return any(tag in lower for tag in html_tags)
+        return _HTML_TAG_RE.search(content) is not None
 
     def _is_layout_table(self, table_element) -> bool:
         """
@@ -1,7 +1,21 @@
+import os
 import subprocess
 from typing import List, Dict, Any
 from loguru import logger
 
+# osascript 绝对路径（跳过 PATH 查找）
+OSASCRIPT = "/usr/bin/osascript"
+
+# osascript 子进程使用的精简环境变量（不复制完整 os.environ）
+# __CF_USER_TEXT_ENCODING 决定 CoreFoundation 的文本编码，需保留以正确输出中文
+OSASCRIPT_ENV = {
+    key: os.environ[key]
+    for key in ("HOME", "USER", "LANG", "LC_ALL", "LC_CTYPE", "TMPDIR", "__CF_USER_TEXT_ENCODING")
+    if key in os.environ
+}
+OSASCRIPT_ENV["PATH"] = "/usr/bin:/bin"
+
+
 class AppleScriptExecutor:
     """AppleScript 执行器"""
 
@@ -10,17 +24,19 @@ class AppleScriptExecutor:
         """执行 AppleScript"""
         try:
             result = subprocess.run(
-                ["osascript", "-e", script],
+                [OSASCRIPT, "-e", script],
                 capture_output=True,
-                text=True,
-                timeout=120  # 增加超时时间到120秒
+                timeout=120,  # 增加超时时间到120秒
+                check=False,
+                env=OSASCRIPT_ENV
             )
 
             if result.returncode != 0:
-                logger.error(f"AppleScript error: {result.stderr}")
-                raise RuntimeError(f"AppleScript failed: {result.stderr}")
+                stderr = result.stderr.decode("utf-8", errors="replace")
+                logger.error(f"AppleScript error: {stderr}")
+                raise RuntimeError(f"AppleScript failed: {stderr}")
 
-            return result.stdout.strip()
+            return result.stdout.decode("utf-8", errors="replace").strip()
 
         except subprocess.TimeoutExpired:
             logger.error("AppleScript execution timed out")
@@ -6,6 +6,7 @@ AppleScript 机械臂模块
 
 核心功能：
 - fetch_emails_by_position(): 按位置获取最新 N 封邮件
+- fetch_emails_range(): 一次调用获取指定区间的邮件（初始化用）
 - fetch_email_by_message_id(): 通过 message_id 获取完整邮件（包含 thread_id）
 - mark_as_read() / set_flag(): 邮件状态写操作
 
@@ -34,6 +35,7 @@ from loguru import logger
 
 from src.config import config
 from src.mail.constants import get_applescript_name
+from src.mail.applescript import OSASCRIPT, OSASCRIPT_ENV
 
 
 class AppleScriptArm:
@@ -114,7 +116,35 @@ class AppleScriptArm:
 
         return emails[:count] if emails else []
 
-    def _fetch_emails_from_applescript(self, count: int, mailbox_name: str, offset: int = 0) -> List[Dict[str, Any]]:
+    def fetch_emails_range(self, mailbox: str, start: int, count: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        一次 AppleScript 调用获取指定区间的邮件（用于初始化时大批量获取）
+
+        超时按 count 相对 init_batch_size 等比放大。
+
+        Args:
+            mailbox: 邮箱名称（收件箱/发件箱）
+            start: 起始位置偏移（0 表示从最新开始）
+            count: 要获取的邮件数量
+
+        Returns:
+            邮件列表（字段同 fetch_emails_by_position）；
+            区间超出邮箱末尾返回空列表，失败或超时返回 None
+        """
+        if count <= 0:
+            return []
+
+        batch_size = max(config.init_batch_size, 1)
+        timeout = config.applescript_timeout * max(1, -(-count // batch_size))
+
+        emails = self._fetch_emails_from_applescript(
+            count, self._get_mailbox_name(mailbox), offset=start, timeout=timeout
+        )
+        self._stats["applescript_calls"] += 1
+        return emails
+
+    def _fetch_emails_from_applescript(self, count: int, mailbox_name: str, offset: int = 0,
+                                       timeout: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
         """
         实际执行 AppleScript 获取邮件（内部方法）
 
@@ -122,9 +152,10 @@ class AppleScriptArm:
             count: 要获取的邮件数量
             mailbox_name: AppleScript 邮箱名称
             offset: 起始位置偏移（0 表示从最新开始）
+            timeout: 超时时间（秒），默认 config.applescript_timeout
 
         Returns:
-            邮件列表，包含 thread_id
+            邮件列表，包含 thread_id；AppleScript 执行失败或超时返回 None
         """
         start_index = offset + 1  # AppleScript 从 1 开始
         end_index = offset + count
@@ -211,9 +242,11 @@ class AppleScriptArm:
         end tell
         '''
 
-        result = self._execute_script(script, timeout=config.applescript_timeout)
+        result = self._execute_script(script, timeout=timeout or config.applescript_timeout)
+        if result is None:
+            logger.warning("fetch_emails_by_position failed")
+            return None
         if not result:
-            logger.warning("fetch_emails_by_position returned empty result")
             return []
 
         emails = []
@@ -466,17 +499,19 @@ class AppleScriptArm:
         """
         try:
             result = subprocess.run(
-                ["osascript", "-e", script],
+                [OSASCRIPT, "-e", script],
                 capture_output=True,
-                text=True,
-                timeout=timeout
+                timeout=timeout,
+                check=False,
+                env=OSASCRIPT_ENV
             )
 
             if result.returncode != 0:
-                logger.error(f"AppleScript error (returncode={result.returncode}): {result.stderr[:200]}")
+                stderr = result.stderr.decode("utf-8", errors="replace")
+                logger.error(f"AppleScript error (returncode={result.returncode}): {stderr[:200]}")
                 return None
 
-            return result.stdout.strip()
+            return result.stdout.decode("utf-8", errors="replace").strip()
 
         except subprocess.TimeoutExpired:
             logger.error(f"AppleScript execution timed out after {timeout}s")
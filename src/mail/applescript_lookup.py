@@ -0,0 +1,185 @@
+"""
+Mail.app 批量查询 AppleScript - 供 scripts/ 下的 backfill 脚本共用
+
+Usage:
+    from src.mail.applescript_lookup import HOT_MAILBOXES, lookup_internal_id_script
+
+    output = await lookup_internal_id_script.run(
+        [account_name, "{{SEP}}".join(HOT_MAILBOXES), *message_ids]
+    )
+"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+from src.config import config
+from src.mail.applescript import OSASCRIPT, OSASCRIPT_ENV
+from src.mail.constants import get_applescript_name
+
+# 优先扫描的邮箱（SYNC_MAILBOXES 对应的 AppleScript 名称），绝大多数邮件位于其中
+HOT_MAILBOXES = [get_applescript_name(mb.strip()) for mb in config.sync_mailboxes.split(",") if mb.strip()]
+
+
+class FetchResult:
+    """AppleScript 查询结果"""
+    def __init__(self, internal_id: int = None, not_found: bool = False, error: str = None, metadata: dict = None):
+        self.internal_id = internal_id
+        self.not_found = not_found
+        self.error = error
+        self.metadata = metadata  # 完整元数据
+
+
+# message_id → internal_id 批量查询脚本（argv: 账户名, 优先邮箱名（{{SEP}} 分隔）, message_id...）
+LOOKUP_INTERNAL_ID_SCRIPT = '''
+on run argv
+    set accountName to item 1 of argv
+    set AppleScript's text item delimiters to "{{SEP}}"
+    set hotNames to text items of (item 2 of argv)
+    set AppleScript's text item delimiters to ""
+    set idList to items 3 thru -1 of argv
+    set foundIds to {}
+    set resultText to ""
+    tell application "Mail"
+        tell account accountName
+            -- 优先扫描常用邮箱（同步邮箱），未命中再按原顺序扫描其余邮箱
+            set scanList to {}
+            repeat with hotName in hotNames
+                if exists mailbox (hotName as string) then set end of scanList to mailbox (hotName as string)
+            end repeat
+            repeat with mbox in mailboxes
+                if hotNames does not contain (name of mbox) then set end of scanList to mbox
+            end repeat
+
+            repeat with mbox in scanList
+                repeat with mid in idList
+                    set midStr to mid as string
+                    if foundIds does not contain midStr then
+                        try
+                            set theMessage to first message of mbox whose message id is midStr
+                            set resultText to resultText & midStr & "{{FIELD}}" & ((id of theMessage) as string) & "{{REC}}"
+                            set end of foundIds to midStr
+                        end try
+                    end if
+                end repeat
+                if (count of foundIds) = (count of idList) then exit repeat
+            end repeat
+        end tell
+    end tell
+    return resultText
+end run
+'''
+
+# internal_id → 元数据批量查询脚本（argv: 账户名, 优先邮箱名（{{SEP}} 分隔）, internal_id...）
+LOOKUP_METADATA_SCRIPT = '''
+on run argv
+    set accountName to item 1 of argv
+    set AppleScript's text item delimiters to "{{SEP}}"
+    set hotNames to text items of (item 2 of argv)
+    set AppleScript's text item delimiters to ""
+    set idList to items 3 thru -1 of argv
+    set foundIds to {}
+    set resultText to ""
+    tell application "Mail"
+        tell account accountName
+            -- 优先扫描常用邮箱（同步邮箱），未命中再按原顺序扫描其余邮箱
+            set scanList to {}
+            repeat with hotName in hotNames
+                if exists mailbox (hotName as string) then set end of scanList to mailbox (hotName as string)
+            end repeat
+            repeat with mbox in mailboxes
+                if hotNames does not contain (name of mbox) then set end of scanList to mbox
+            end repeat
+
+            repeat with mbox in scanList
+                set mboxName to name of mbox
+                repeat with iid in idList
+                    set iidNum to iid as integer
+                    if foundIds does not contain iidNum then
+                        try
+                            set theMessage to first message of mbox whose id is iidNum
+                            set msgId to message id of theMessage
+                            set msgSubject to subject of theMessage
+                            set msgSender to sender of theMessage
+                            set msgDate to date received of theMessage
+
+                            -- ISO 8601（YYYY-MM-DDTHH:MM:SS，本地时间）
+                            set dateStr to (msgDate as «class isot» as string)
+
+                            set resultText to resultText & (iidNum as string) & "{{FIELD}}" & msgId & "{{SEP}}" & msgSubject & "{{SEP}}" & msgSender & "{{SEP}}" & dateStr & "{{SEP}}" & mboxName & "{{REC}}"
+                            set end of foundIds to iidNum
+                        end try
+                    end if
+                end repeat
+                if (count of foundIds) = (count of idList) then exit repeat
+            end repeat
+        end tell
+    end tell
+    return resultText
+end run
+'''
+
+
+class CompiledAppleScript:
+    """预编译的参数化 AppleScript
+
+    首次使用时通过 osacompile 编译为 .scpt，之后每次调用
+    `osascript <file.scpt> args...` 跳过源码解析和编译。
+    osacompile 不可用时回退为 `osascript -e <source> args...`。
+    """
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self._script_args: Optional[List[str]] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_compiled(self) -> List[str]:
+        async with self._lock:
+            if self._script_args is None:
+                path = Path(tempfile.gettempdir()) / f"mailagent_{self.name}.scpt"
+                try:
+                    proc = await asyncio.create_subprocess_exec(
+                        '/usr/bin/osacompile', '-o', str(path), '-e', self.source,
+                        stdout=asyncio.subprocess.DEVNULL,
+                        stderr=asyncio.subprocess.PIPE,
+                        env=OSASCRIPT_ENV
+                    )
+                    await proc.communicate()
+                    compiled = proc.returncode == 0
+                except OSError:
+                    compiled = False
+                self._script_args = [str(path)] if compiled else ['-e', self.source]
+            return self._script_args
+
+    async def run(self, args: List[str], timeout: int = 300) -> str:
+        """执行脚本，返回 stdout
+
+        Raises:
+            asyncio.TimeoutError: 超时（子进程会被终止）
+            RuntimeError: osascript 返回非 0
+        """
+        script_args = await self._ensure_compiled()
+        proc = await asyncio.create_subprocess_exec(
+            OSASCRIPT, *script_args, *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=OSASCRIPT_ENV
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+
+        if proc.returncode != 0:
+            error = stderr.decode("utf-8", errors="replace").strip()
+            raise RuntimeError(error or f"osascript exit code {proc.returncode}")
+
+        return stdout.decode("utf-8", errors="replace").strip()
+
+
+lookup_internal_id_script = CompiledAppleScript("lookup_internal_id", LOOKUP_INTERNAL_ID_SCRIPT)
+lookup_metadata_script = CompiledAppleScript("lookup_metadata", LOOKUP_METADATA_SCRIPT)
@@ -26,6 +26,7 @@ Usage:
 """
 
 import asyncio
+import weakref
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional, Any, Callable, Awaitable
 from loguru import logger
@@ -67,6 +68,9 @@ def _parse_sync_start_date() -> Optional[datetime]:
 class NewWatcher:
     """新架构邮件同步监听器"""
 
+    # pending 邮件并发同步数（与 Notion API ~3 req/s 限制匹配）
+    PENDING_CONCURRENCY = 3
+
     def __init__(
         self,
         mailboxes: List[str] = None,
@@ -115,6 +119,9 @@ class NewWatcher:
         self.email_reader = EmailReader()
         self.meeting_sync = MeetingInviteSync()  # 会议邀请同步器
 
+        # 线程锁：同一线程的邮件串行写入 Notion，避免并发处理线程关系（Sub-item）时互相覆盖
+        self._thread_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
         # 运行状态
         self._running = False
         self._healthy = True  # 服务健康状态
@@ -282,8 +289,22 @@ class NewWatcher:
 
         logger.info(f"Processing {len(pending_emails)} pending emails...")
 
-        for email_meta in pending_emails:
-            await self._sync_single_email_v3(email_meta)
+        # 有界并发：AppleScript 获取与其他邮件的 Notion 请求重叠执行
+        semaphore = asyncio.Semaphore(self.PENDING_CONCURRENCY)
+
+        async def sync_one(email_meta: Dict[str, Any]):
+            async with semaphore:
+                await self._sync_single_email_v3(email_meta)
+
+        await asyncio.gather(*(sync_one(email_meta) for email_meta in pending_emails))
+
+    def _get_thread_lock(self, key: str) -> asyncio.Lock:
+        """获取线程锁（按 thread_id，无 thread_id 时按 message_id）"""
+        lock = self._thread_locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._thread_locks[key] = lock
+        return lock
 
     async def _sync_single_email_v3(self, email_meta: Dict[str, Any]):
         """同步单封邮件（v3 架构）
@@ -301,7 +322,8 @@ class NewWatcher:
             logger.info(f"Syncing email {internal_id}: {email_meta.get('subject', '')[:50]}...")
 
             # 1. 通过 internal_id 获取完整邮件内容（127x 性能提升）
-            full_email = self.arm.fetch_email_content_by_id(internal_id, mailbox)
+            # osascript 是阻塞的子进程调用，放到线程中执行，不阻塞其他邮件的 Notion 请求
+            full_email = await asyncio.to_thread(self.arm.fetch_email_content_by_id, internal_id, mailbox)
             if not full_email:
                 logger.warning(f"Failed to fetch email content by id {internal_id}")
                 self.sync_store.mark_fetch_failed(internal_id, "AppleScript fetch failed")
@@ -318,43 +340,45 @@ class NewWatcher:
                 'sender': full_email.get('sender')
             })
 
-            # 3. 检测并处理会议邀请
-            source = full_email.get('source', '')
-            meeting_invite = None
-            if self.meeting_sync.has_meeting_invite(source):
-                calendar_page_id, meeting_invite = await self.meeting_sync.process_email(source, message_id)
-                if calendar_page_id:
-                    self._stats["meeting_invites"] += 1
-                    logger.info(f"Meeting invite synced to calendar: {calendar_page_id}")
-
-            # 4. 解析邮件源码，构建 Email 对象
-            email_obj = await self._build_email_object(full_email, mailbox)
-            if not email_obj:
-                logger.error(f"Failed to build Email object: {internal_id}")
-                self.sync_store.mark_failed_v3(internal_id, "Failed to build Email object")
-                return
-
-            # 设置 internal_id（v3 架构）
-            email_obj.internal_id = internal_id
-
-            # 5. 日期过滤：早于 sync_start_date 的邮件不同步到 Notion
-            if self.sync_start_date and email_obj.date:
-                email_date = email_obj.date
-                if email_date.tzinfo is None:
-                    email_date = email_date.replace(tzinfo=timezone(timedelta(hours=8)))
-
-                if email_date < self.sync_start_date:
-                    logger.info(f"Skipping old email: {email_date.strftime('%Y-%m-%d')} < {self.sync_start_date.strftime('%Y-%m-%d')}")
-                    self.sync_store.mark_skipped(internal_id)
-                    self._stats["emails_skipped"] += 1
+            # 3~6 在线程锁内执行：同一线程的邮件串行处理线程关系
+            async with self._get_thread_lock(thread_id or message_id or str(internal_id)):
+                # 3. 检测并处理会议邀请
+                source = full_email.get('source', '')
+                meeting_invite = None
+                if self.meeting_sync.has_meeting_invite(source):
+                    calendar_page_id, meeting_invite = await self.meeting_sync.process_email(source, message_id)
+                    if calendar_page_id:
+                        self._stats["meeting_invites"] += 1
+                        logger.info(f"Meeting invite synced to calendar: {calendar_page_id}")
+
+                # 4. 解析邮件源码，构建 Email 对象
+                email_obj = await self._build_email_object(full_email, mailbox)
+                if not email_obj:
+                    logger.error(f"Failed to build Email object: {internal_id}")
+                    self.sync_store.mark_failed_v3(internal_id, "Failed to build Email object")
                     return
 
-            # 6. 同步到 Notion
-            page_id = await self.notion_sync.create_email_page_v2(
-                email_obj,
-                calendar_page_id=calendar_page_id,
-                meeting_invite=meeting_invite
-            )
+                # 设置 internal_id（v3 架构）
+                email_obj.internal_id = internal_id
+
+                # 5. 日期过滤：早于 sync_start_date 的邮件不同步到 Notion
+                if self.sync_start_date and email_obj.date:
+                    email_date = email_obj.date
+                    if email_date.tzinfo is None:
+                        email_date = email_date.replace(tzinfo=timezone(timedelta(hours=8)))
+
+                    if email_date < self.sync_start_date:
+                        logger.info(f"Skipping old email: {email_date.strftime('%Y-%m-%d')} < {self.sync_start_date.strftime('%Y-%m-%d')}")
+                        self.sync_store.mark_skipped(internal_id)
+                        self._stats["emails_skipped"] += 1
+                        return
+
+                # 6. 同步到 Notion
+                page_id = await self.notion_sync.create_email_page_v2(
+                    email_obj,
+                    calendar_page_id=calendar_page_id,
+                    meeting_invite=meeting_invite
+                )
 
             if page_id:
                 # 7. 更新 SyncStore (synced)
@@ -1,9 +1,9 @@
 import asyncio
-from notion_client import AsyncClient
 from typing import Dict, Any, List, Optional, Set
 from loguru import logger
 
 from src.config import config
+from src.notion.rate_limit import create_rate_limited_client
 
 # Notion File Upload API 支持的扩展名（官方文档）
 # https://developers.notion.com/docs/uploading-small-files
@@ -28,7 +28,8 @@ class NotionClient:
     BASE_RETRY_DELAY = 1.0  # seconds
 
     def __init__(self):
-        self.client = AsyncClient(auth=config.notion_token)
+        # 传输层限速（进程内所有 Notion 客户端共享 3 次/秒），并发请求（如分页预取）不会触发 429
+        self.client = create_rate_limited_client()
         self.email_db_id = config.email_database_id
         self._http_session: Optional["aiohttp.ClientSession"] = None
 
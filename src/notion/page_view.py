@@ -0,0 +1,128 @@
+"""
+Notion 邮件页面字段解析 - 供 scripts/ 下的检查、修复脚本共用
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.notion.rate_limit import with_backoff
+
+
+@dataclass(slots=True)
+class PageInfo:
+    """邮件页面的常用字段"""
+    page_id: str
+    subject: str = ""
+    message_id: str = ""
+    thread_id: str = ""
+    date: str = ""  # Date 属性的 start（原始 ISO 字符串）
+    sender: str = ""  # From 属性的邮箱
+    row_id: Optional[int] = None
+    conv_id: Optional[int] = None
+    id_number: Optional[int] = None  # ID 属性（Mail.app internal_id）
+    parent_id: Optional[str] = None  # Parent Item 关联的第一个页面
+    created_time: str = ""
+
+
+def parse_page(page: Dict[str, Any]) -> PageInfo:
+    """从 Notion 页面 JSON 中提取常用字段
+
+    每个属性只查一次字典；属性存在时直接下标访问，不为缺失的层级构造默认 {}。
+    """
+    props = page["properties"]
+
+    prop = props.get("Subject")
+    items = prop["title"] if prop else None
+    subject = items[0]["plain_text"] if items else ""
+
+    prop = props.get("Message ID")
+    items = prop["rich_text"] if prop else None
+    message_id = items[0]["plain_text"] if items else ""
+
+    prop = props.get("Thread ID")
+    items = prop["rich_text"] if prop else None
+    thread_id = items[0]["plain_text"] if items else ""
+
+    prop = props.get("Date")
+    date = prop["date"] if prop else None
+    date = (date["start"] or "") if date else ""
+
+    prop = props.get("From")
+    sender = (prop["email"] or "") if prop else ""
+
+    prop = props.get("Row ID")
+    row_id = prop["number"] if prop else None
+
+    prop = props.get("Conversation ID")
+    conv_id = prop["number"] if prop else None
+
+    prop = props.get("ID")
+    id_number = prop["number"] if prop else None
+
+    prop = props.get("Parent Item")
+    items = prop["relation"] if prop else None
+    parent_id = items[0]["id"] if items else None
+
+    return PageInfo(
+        page_id=page["id"],
+        subject=subject,
+        message_id=message_id,
+        thread_id=thread_id,
+        date=date,
+        sender=sender,
+        row_id=row_id,
+        conv_id=conv_id,
+        id_number=id_number,
+        parent_id=parent_id,
+        created_time=page.get("created_time", ""),
+    )
+
+
+# database_id -> {属性名: 属性 ID}，进程内缓存
+_property_id_cache: Dict[str, Dict[str, str]] = {}
+
+
+async def get_property_ids(client, database_id: str, names: List[str]) -> List[str]:
+    """获取数据库属性 ID（用于 databases.query 的 filter_properties，只返回需要的属性）
+
+    每个数据库只查询一次；数据库中不存在的属性名会被忽略。
+    """
+    property_ids = _property_id_cache.get(database_id)
+    if property_ids is None:
+        database = await client.databases.retrieve(database_id=database_id)
+        property_ids = {name: prop["id"] for name, prop in database.get("properties", {}).items()}
+        _property_id_cache[database_id] = property_ids
+
+    return [property_ids[name] for name in names if name in property_ids]
+
+
+async def iter_database_pages(client, **params) -> AsyncIterator[Dict[str, Any]]:
+    """逐个产出 databases.query 的全部结果页面（处理分页，不在内存中累积）
+
+    处理当前一页时已预取下一页（同一时刻最多一个请求在途），
+    每次查询遇到 429 / 5xx 退避重试；迭代提前结束时取消在途的预取。
+
+    Args:
+        client: Notion AsyncClient
+        **params: databases.query 参数（database_id / filter / sorts 等）
+    """
+    def query(start_cursor: Optional[str] = None) -> asyncio.Task:
+        query_params = dict(params)
+        if start_cursor:
+            query_params["start_cursor"] = start_cursor
+        return asyncio.create_task(with_backoff(lambda: client.databases.query(**query_params)))
+
+    next_task = query()
+    try:
+        while next_task:
+            response = await next_task
+            next_task = None
+            if response.get("has_more", False):
+                next_task = query(response.get("next_cursor"))
+
+            for page in response.get("results", []):
+                yield page
+    finally:
+        if next_task:
+            next_task.cancel()
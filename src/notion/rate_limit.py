@@ -0,0 +1,120 @@
+"""
+Notion API 限速 - 在 httpx 传输层统一控制请求速率
+
+Notion API 平均限速约 3 次/秒，超出后返回 429。
+在传输层排队发出请求，调用方无需自行 sleep，也不会浪费 429 重试。
+"""
+
+import asyncio
+import importlib.util
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+from notion_client import AsyncClient
+from notion_client.errors import HTTPResponseError
+
+from src.config import config
+
+# Notion API 请求速率上限（次/秒）
+NOTION_RATE_LIMIT = 3
+
+# 批量写入时同时在途的 Notion 请求数（与速率上限一致，用并发掩盖单次请求延迟）
+NOTION_MAX_CONCURRENCY = 3
+
+# 连接池大小（keep-alive 复用连接，避免每次请求重新握手）
+MAX_CONNECTIONS = 8
+
+# 安装了 h2 时启用 HTTP/2（多个并发请求复用同一 TLS 连接）
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 429 / 5xx 重试设置
+MAX_RETRIES = 5
+BASE_RETRY_DELAY = 1.0  # seconds
+MAX_RETRY_DELAY = 32.0  # seconds
+
+
+class RateLimiter:
+    """请求速率限制器：相邻两次 acquire() 返回的间隔不小于 1 / max_rate 秒
+
+    Notion 按 integration 计算限速，进程内所有客户端共享同一个实例（见 notion_rate_limiter）。
+    """
+
+    def __init__(self, max_rate: float = NOTION_RATE_LIMIT):
+        self._interval = 1.0 / max_rate
+        self._next_time = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio.Lock 绑定首次使用的事件循环，每个事件循环（如多次 asyncio.run）各用一把锁
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self):
+        """等待到下一个可发请求的时间点"""
+        async with self._get_lock():
+            now = asyncio.get_running_loop().time()
+            if self._next_time > now:
+                await asyncio.sleep(self._next_time - now)
+                now = self._next_time
+            self._next_time = now + self._interval
+
+
+# 进程内共享的 Notion 限速器（所有限速客户端共用 3 次/秒的额度）
+notion_rate_limiter = RateLimiter(NOTION_RATE_LIMIT)
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """限速传输层：每个请求发出前先向限速器申请额度"""
+
+    def __init__(self, limiter: RateLimiter = notion_rate_limiter,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport or httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+        )
+        self._limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self._limiter.acquire()
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def create_rate_limited_client(limiter: RateLimiter = notion_rate_limiter) -> AsyncClient:
+    """创建带传输层限速（及连接池 / HTTP/2）的 Notion AsyncClient
+
+    默认使用进程内共享的 notion_rate_limiter，多个客户端合计不超过 NOTION_RATE_LIMIT。
+    """
+    http_client = httpx.AsyncClient(transport=RateLimitedTransport(limiter))
+    return AsyncClient(auth=config.notion_token, client=http_client)
+
+
+async def with_backoff(fn: Callable[[], Awaitable[Any]], max_retries: int = MAX_RETRIES) -> Any:
+    """执行 Notion 请求，遇到 429 / 5xx 时退避重试
+
+    429 优先按 Retry-After 等待，否则指数退避 + 随机抖动（上限 MAX_RETRY_DELAY）。
+    其他错误及重试耗尽后的错误直接抛出。
+
+    Args:
+        fn: 每次调用返回一个新的请求 awaitable，如 lambda: client.pages.update(...)
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return await fn()
+        except HTTPResponseError as e:
+            if attempt == max_retries or not (e.status == 429 or e.status >= 500):
+                raise
+
+            retry_after = e.headers.get("retry-after") if e.status == 429 else None
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = min(BASE_RETRY_DELAY * (2 ** attempt) + random.random() * 0.5, MAX_RETRY_DELAY)
+            await asyncio.sleep(delay)
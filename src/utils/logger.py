@@ -18,7 +18,8 @@ def setup_logger(log_level: str = "INFO", log_file: str = "logs/sync.log"):
         sys.stdout,
         level=log_level,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        colorize=True
+        colorize=True,
+        enqueue=True  # 后台线程写入，日志调用不阻塞同步循环
     )
 
     # 添加文件输出
@@ -31,7 +32,8 @@ def setup_logger(log_level: str = "INFO", log_file: str = "logs/sync.log"):
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
         rotation="10 MB",  # 文件大小超过 10MB 时轮转
         retention="7 days",  # 保留 7 天
-        compression="zip"  # 压缩旧日志
+        compression="zip",  # 压缩旧日志
+        enqueue=True
     )
 
     logger.info(f"Logger initialized - Level: {log_level}")